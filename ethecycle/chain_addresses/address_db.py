@@ -4,20 +4,28 @@ updating all data in a given table from a given data_source.
 Context managers: https://rednafi.github.io/digressions/python/2020/03/26/python-contextmanager.html#nesting-contexts
 """
 import json
+import pickle
+import sqlite3
+from collections import Counter
 from contextlib import contextmanager
-from sqlite3.dbapi2 import IntegrityError
-from typing import Any, Dict, List, Optional, Union
+from dataclasses import fields
+from os import getpid, path, remove, replace, stat
+from pathlib import Path
+from threading import RLock
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar, Union
 
 import sqllex as sx
 from rich.panel import Panel
 from rich.pretty import pprint
 
 from ethecycle.chain_addresses import db
-from ethecycle.chain_addresses.db.table_definitions import DATA_SOURCE_ID, DATA_SOURCES_TABLE_NAME, TABLE_DEFINITIONS
+from ethecycle.chain_addresses.db.table_definitions import (ADDRESS_TABLE_DEFINITIONS, ADDRESS_UNIQUE_INDEX,
+     DATA_SOURCE_ID, DATA_SOURCES_TABLE_NAME, TABLE_DEFINITIONS, TableDefinition)
 from ethecycle.config import Config
 #from ethecycle.models.token import Token
 from ethecycle.util.list_helper import compare_lists
-from ethecycle.util.logging import console, log, print_dim, print_indented
+from ethecycle.util.logging import console, log, print_dim
+from ethecycle.util.number_helper import MEGABYTE
 from ethecycle.util.string_constants import *
 from ethecycle.util.time_helper import current_timestamp_iso8601_str
 #from ethecycle.models.wallet import Wallet
@@ -27,50 +35,98 @@ DbRows = List[Dict[str, Any]]
 # TODO: Deal with this a better way
 COLUMNS_TO_NOT_LOAD = ['chain_info', 'data_source']
 
+# Bump when the pickled classes change shape so existing snapshots are ignored
+SNAPSHOT_FORMAT_VERSION = 1
+SNAPSHOT_EXTENSION = '.snapshot.pickle'
+
+# Negative cache_size is in KiB
+BULK_IMPORT_CACHE_SIZE = -256 * 1024
+STAGED_ROWS_TABLE_NAME = 'staged_address_rows'
+
+# Settings for the long lived connection; lookups are read heavy
+CONNECTION_PRAGMAS = {
+    'cache_size': -64 * 1024,  # KiB
+    'foreign_keys': 'ON',
+    'mmap_size': 256 * MEGABYTE,
+    'temp_store': 'MEMORY',
+}
+
+# The connection is shared by all of a process' threads (e.g. the stages of the txn loading pipeline).
+# Reads hold this lock; bulk writes (imports) only ever happen in a single thread.
+_connection_lock = RLock()
+
+# data_source => data_sources.id in the DB db._db points at (cleared when that DB is replaced or dropped)
+_data_source_ids: Dict[str, int] = {}
+# When not None insert_addresses() appends its args here instead of writing them (see collected_address_batches())
+_collected_batches: Optional[List[List['Address']]] = None
+
+T = TypeVar('T')
+
 
 @contextmanager
 def table_connection(table_name):
-    """Connect to db and yield table obj. Disconnects automatically when done to commit data."""
-    db = get_db_connection()
+    """Yield table obj from the shared connection. Commits automatically when done."""
+    with _connection_lock:
+        db_conn = get_db_connection()
 
-    try:
-        yield db[table_name]
-    except Exception as e:
-        console.print(f"Exception {e} while connected to '{table_name}'...")
-        raise e
-    finally:
-        # Hold connection open for big inserts bc writing is slow.
-        if not Config.skip_load_from_db:
-            db.disconnect()
+        try:
+            yield db_conn[table_name]
+        except Exception as e:
+            console.print(f"Exception {e} while connected to '{table_name}'...")
+            raise e
+        finally:
+            _commit(db_conn)
 
 
 def insert_addresses(objs: List['Address']) -> None:
-    """Insert 'rows' into table named 'table_name'. Assumes all rows have the same data_source."""
+    """
+    Insert 'objs' into their table, replacing any rows previously imported from the same data_source.
+    Assumes all objs have the same data_source. Rows colliding with an earlier row are skipped.
+    """
     if len(objs) == 0:
         print_dim("Nothing to write...")
         return
+    elif _collected_batches is not None:
+        _collected_batches.append(objs)
+        return
 
-    db_conn = get_db_connection()
     table_name = objs[0].table_name()
     data_source = objs[0].data_source
-    columns = db_conn.get_columns_names(table_name)
     print_dim(f"Bulk writing {len(objs)} rows to table '{table_name}'...")
     _delete_rows_from_source(table_name, data_source)
-    row_tuples = [[row.get(c) for c in columns] for row in _to_db_dicts(objs)]
+    db_conn = get_db_connection()
+    columns = list(db_conn.get_columns_names(table_name))
+    row_tuples = _to_db_rows(objs, columns)
+    # OR IGNORE skips rows that violate the unique index or a NOT NULL constraint instead of failing the batch
+    insert_sql = f"INSERT OR IGNORE INTO {table_name} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
 
     try:
-        db_conn.insertmany(table_name, row_tuples)
-    except IntegrityError as e:
-        print_indented(f"{e} bulk loading!", style='red dim')
-        print_indented("Cleaning up and switching to one at a time...", style='white dim')
-        _delete_rows_from_source(table_name, data_source)
-        _insert_one_at_a_time(table_name, row_tuples)
+        with _bulk_import_pragmas(db_conn.connection):
+            with db_conn.connection:  # Commits (or rolls back) all the rows in one transaction
+                rows_written = db_conn.connection.executemany(insert_sql, row_tuples).rowcount
+
+        if rows_written < len(row_tuples):
+            _report_skipped_rows(db_conn.connection, table_name, columns, row_tuples, len(row_tuples) - rows_written)
     finally:
-        # Hold connection open for big inserts bc writing is slow.
-        if not Config.skip_load_from_db:
-            db_conn.disconnect()
+        _table_definition(table_name).drop_coalesced_table(db_conn)  # Rebuilt by refresh_coalesced_tables()
+        _commit(db_conn)
+
+    print_dim(f"Finished writing {rows_written} rows to '{table_name}'.")
+
+
+@contextmanager
+def collected_address_batches():
+    """
+    Within this context insert_addresses() doesn't touch the DB; it collects its args in the yielded list
+    so they can be written later (e.g. by another process).
+    """
+    global _collected_batches
+    _collected_batches = batches = []
 
-    print_dim(f"Finished writing {len(objs)} rows to '{table_name}'.")
+    try:
+        yield batches
+    finally:
+        _collected_batches = None
 
 
 def _delete_rows_from_source(table_name: str, _data_source: str) -> None:
@@ -90,6 +146,36 @@ def _delete_rows_from_source(table_name: str, _data_source: str) -> None:
         db_table.delete({DATA_SOURCE_ID: data_source_id})
 
 
+def select_coalesced_rows(table_name: str, column_names: List[str]) -> DbRows:
+    """Read the pre-merged row for each address from 'table_name' (building the coalesced table if needed)."""
+    table_definition = _table_definition(table_name)
+    coalesced_table = table_definition.coalesced_table_name
+
+    with _connection_lock:
+        db_conn = get_db_connection()
+
+        if not is_table_in_database(coalesced_table):
+            if db._db_is_read_only:
+                coalesced_table = f"({table_definition.coalesced_rows_sql()})"  # Can't materialize it so query it directly
+            else:
+                table_definition.create_coalesced_table(db_conn)
+                _commit(db_conn)
+
+        rows = db_conn.execute(script=f"SELECT {', '.join(column_names)} FROM {coalesced_table}")
+
+    return [dict(zip(column_names, row)) for row in rows]
+
+
+def refresh_coalesced_tables() -> None:
+    """Rebuild the coalesced tables to reflect the current contents of the DB. Should be called after imports."""
+    db_conn = get_db_connection()
+
+    for table_definition in ADDRESS_TABLE_DEFINITIONS:
+        table_definition.create_coalesced_table(db_conn)
+
+    _commit(db_conn)
+
+
 def is_table_in_database(table_name: str) -> bool:
     """Returns true if a table named 'table_name' exists in the DB."""
     try:
@@ -106,54 +192,78 @@ def drop_and_recreate_tables() -> None:
     for table_definition in TABLE_DEFINITIONS:
         table_definition.drop_table(db_conn)
 
+    for table_definition in ADDRESS_TABLE_DEFINITIONS:
+        table_definition.drop_coalesced_table(db_conn)
+
+    _data_source_ids.clear()
+
     for table_definition in TABLE_DEFINITIONS:
         table_definition.create_table(db_conn)
 
 
 def get_db_connection() -> sx.SQLite3x:
-    """Make sure db._db is built / connected and that the tables have been created."""
-    if db._db is None:
-        db._db = sx.SQLite3x(path=db.CHAIN_ADDRESSES_DB_PATH)
+    """
+    Return this process' long lived connection, (re)opening it if it's not open. The first time a
+    process connects to a given DB file make sure the tables have been created.
+    """
+    with _connection_lock:
+        if db._db is None or not db._db.connection or db._db_pid != getpid():
+            db._db = sx.SQLite3x(path=db.CHAIN_ADDRESSES_DB_PATH, connection=_open_sqlite_connection())
+            db._db_pid = getpid()
 
-    if not _is_connected_to_db_file():
-        db._db.connect()
+        if db._verified_db_path != db.CHAIN_ADDRESSES_DB_PATH:
+            _data_source_ids.clear()
 
-    for table_definition in TABLE_DEFINITIONS:
-        if not is_table_in_database(table_definition.table_name):
-            table_definition.create_table(db._db)
+            if not db._db_is_read_only:
+                for table_definition in TABLE_DEFINITIONS:
+                    if not is_table_in_database(table_definition.table_name):
+                        table_definition.create_table(db._db)
+
+            db._verified_db_path = db.CHAIN_ADDRESSES_DB_PATH
 
-    return db._db
+        return db._db
 
 
-def coalesce_rows(rows: DbRows) -> DbRows:
-    """Assemble the best data for each address by combining the data_sources in the DB."""
-    if len(rows) == 0:
-        return rows
+def load_with_snapshot(snapshot_name: str, build: Callable[[], T]) -> T:
+    """
+    Return the result of build() (which should read from the DB) but pickle it next to the DB file
+    and return the pickled copy instead of calling build() if the DB hasn't changed since.
+    """
+    snapshot_path = path.join(path.dirname(db.CHAIN_ADDRESSES_DB_PATH), f"{snapshot_name}{SNAPSHOT_EXTENSION}")
+    db_fingerprint = _db_fingerprint()  # Taken before reading so writes during build() invalidate the snapshot
 
-    cols = list(rows[0].keys())
-    coalesced_rows: Dict[str, Dict[str, Any]] = {}
+    if path.isfile(snapshot_path):
+        try:
+            with open(snapshot_path, 'rb') as snapshot_file:
+                snapshot_fingerprint, data = pickle.load(snapshot_file)
 
-    for row in rows:
-        address = row[ADDRESS]
+            if snapshot_fingerprint == db_fingerprint:
+                log.debug(f"Loaded '{snapshot_name}' from snapshot '{snapshot_path}'")
+                return data
+        except Exception as e:
+            log.warning(f"Failed to load snapshot '{snapshot_path}' ({e}), rebuilding...")
 
-        # If the address is not in the coalesced_rows yet just add it and go to next row
-        if address not in coalesced_rows:
-            #log.debug(f"Initializing {address} with data from {row['data_source_id']}")
-            coalesced_rows[address] = row
-            continue
+    with _connection_lock:  # Threads that need the same data wait for the first one to build it
+        data = build()
 
-        # Otherwise fill in any missing fields in the coalesced row with data from 'row'
-        coalesced_row = coalesced_rows[address]
+    tmp_snapshot_path = f"{snapshot_path}.{getpid()}.tmp"
 
-        for col in cols:
-            #log.debug(f"Updating {address}: {col} with '{row[col]}' from {row['data_source_id']}...")
-            coalesced_row[col] = coalesced_row.get(col) or row.get(col)
+    try:
+        with open(tmp_snapshot_path, 'wb') as snapshot_file:
+            pickle.dump((db_fingerprint, data), snapshot_file, protocol=pickle.HIGHEST_PROTOCOL)
+
+        replace(tmp_snapshot_path, snapshot_path)  # Atomic so concurrent readers never see a partial file
+    except OSError as e:
+        log.warning(f"Failed to write snapshot '{snapshot_path}' ({e})")
 
-    return list(coalesced_rows.values())
+        if path.exists(tmp_snapshot_path):
+            remove(tmp_snapshot_path)
 
+    return data
 
-def _to_db_dicts(objs: List['Address']) -> List[Dict[str, Any]]:
-    """Validate all rows have same data_source. Set 'extracted_at' and 'data_source_id' fields. Make dicts."""
+
+def _to_db_rows(objs: List['Address'], columns: List[str]) -> List[Tuple[Any, ...]]:
+    """Validate all objs have same data_source. Set 'extracted_at' and 'data_source_id' fields. Make 'columns' tuples."""
     data_source = objs[0].data_source
 
     if data_source is None or not isinstance(data_source, str):
@@ -161,6 +271,10 @@ def _to_db_dicts(objs: List['Address']) -> List[Dict[str, Any]]:
 
     extracted_at = current_timestamp_iso8601_str()
     data_source_id = _get_or_create_data_source_id(data_source)
+    field_names = set(f.name for f in fields(objs[0]))
+    column_fields = [col if col in field_names else None for col in columns]
+    extra_fields_idx = column_fields.index('extra_fields') if 'extra_fields' in column_fields else None
+    rows = []
 
     for obj in objs:
         if obj.data_source != data_source:
@@ -168,93 +282,166 @@ def _to_db_dicts(objs: List['Address']) -> List[Dict[str, Any]]:
 
         obj.extracted_at = obj.extracted_at or extracted_at
         obj.data_source_id = data_source_id
+        row = [None if field is None else getattr(obj, field) for field in column_fields]
+
+        if extra_fields_idx is not None and row[extra_fields_idx] is not None:
+            row[extra_fields_idx] = json.dumps(row[extra_fields_idx])
 
-        if 'extra_fields' in dir(obj) and obj.extra_fields is not None:
-            obj.extra_fields = json.dumps(obj.extra_fields)
+        rows.append(tuple(row))
 
-    return [obj.__dict__ for obj in objs]
+    return rows
 
 
-def _insert_one_at_a_time(table_name: str, rows: List[List[Any]]) -> None:
-    """Insert 'rows' into table named 'table_name' one at a time for use as a fallback."""
-    console.print(f"Fallback write {len(rows)} rows to '{table_name}' one at a time...", style='yellow dim')
-    rows_written = 0
+def _table_definition(table_name: str) -> TableDefinition:
+    return next(table_definition for table_definition in TABLE_DEFINITIONS if table_definition.table_name == table_name)
+
+
+def _db_fingerprint() -> Tuple[int, ...]:
+    """Changes whenever the DB file (or the write ahead log of a DB with uncheckpointed writes) changes."""
+    fingerprint = [SNAPSHOT_FORMAT_VERSION]
+
+    for db_file in [db.CHAIN_ADDRESSES_DB_PATH, db.CHAIN_ADDRESSES_DB_PATH + '-wal']:
+        if path.isfile(db_file) and stat(db_file).st_size > 0:
+            fingerprint.extend([stat(db_file).st_mtime_ns, stat(db_file).st_size])
+
+    return tuple(fingerprint)
+
+
+def _report_skipped_rows(
+        connection: sqlite3.Connection,
+        table_name: str,
+        columns: List[str],
+        rows: List[Tuple[Any, ...]],
+        skipped: int
+    ) -> None:
+    """
+    Warn about rows that were skipped because another row in 'rows' had the same blockchain and address.
+    Rows sharing a key with another row are staged in a temp table. A staged row was written if the table
+    has a row with exactly the same contents (the first such staged row if there are identical copies);
+    the rest were skipped and the valid ones are compared to the row that was written for their key with
+    a single join.
+    """
+    key_idxs = [columns.index(col) for col in ADDRESS_UNIQUE_INDEX]
+    key_match = ' AND '.join(f"kept.{col} IS staged.{col}" for col in ADDRESS_UNIQUE_INDEX)
+    row_match = ' AND '.join(f"kept.{col} IS staged.{col}" for col in columns)
+    not_null_columns = [row[1] for row in connection.execute(f"PRAGMA table_info({table_name})") if row[3]]
+    # Rows with missing required values were never going to be written so they're not collisions
+    is_valid = ' AND '.join(f"staged.{col} IS NOT NULL" for col in not_null_columns) or '1'
     failed_writes = 0
     identical_writes = 0
+    mismatch_counts = Counter()
+    key_counts = Counter(tuple(row[i] for i in key_idxs) for row in rows)
+    # Rows with a unique key can't have collided with anything (they're either written or invalid)
+    staged_rows = [row for row in rows if key_counts[tuple(row[i] for i in key_idxs)] > 1]
+    connection.execute(f"CREATE TEMP TABLE {STAGED_ROWS_TABLE_NAME} AS SELECT * FROM {table_name} LIMIT 0")
+
+    try:
+        with connection:
+            connection.executemany(f"INSERT INTO {STAGED_ROWS_TABLE_NAME} VALUES ({', '.join('?' * len(columns))})", staged_rows)
+
+            collisions = connection.execute(f"""
+                SELECT {', '.join('staged.' + col for col in columns)}, {', '.join('kept.' + col for col in columns)}
+                FROM {STAGED_ROWS_TABLE_NAME} AS staged
+                JOIN {table_name} AS kept ON {key_match}
+                WHERE {is_valid}
+                  AND staged.rowid NOT IN (
+                    SELECT MIN(staged.rowid)
+                    FROM {STAGED_ROWS_TABLE_NAME} AS staged
+                    JOIN {table_name} AS kept ON {row_match}
+                    GROUP BY kept.rowid
+                )
+                ORDER BY staged.rowid
+            """).fetchall()
+    finally:
+        connection.execute(f"DROP TABLE {STAGED_ROWS_TABLE_NAME}")
 
-    with table_connection(table_name) as table:
-        column_names = table.get_columns_names()
+    for collision in collisions:
+        row, old_row = collision[:len(columns)], collision[len(columns):]
+        row_dict = dict(zip(columns, row))
+        msg = f"Address collision for {row_dict[ADDRESS]} ({row_dict[BLOCKCHAIN]}).\n"
+        msg +="Mismatched cols:\n    "
+        mismatches = compare_lists(row, old_row, columns, ['extra_fields'])
 
-        for row in rows:
-            log.debug(f"Inserting {row}")
+        if len(mismatches) > 0:
+            failed_writes += 1
+            mismatch_counts.update(c for c, new, old in zip(columns, row, old_row) if new != old and c != 'extra_fields')
 
-            try:
-                table.insert(row)
-                rows_written += 1
-            except IntegrityError as e:
-                if Config.debug:
-                    console.print_exception()
+            if not Config.suppress_chain_address_db_collision_warnings:
+                log.warning(msg + mismatches + "\n  (Keeping only original row)")
+        else:
+            identical_writes += 1
 
-                if 'UNIQUE constraint' in str(e):
-                    row_dict = dict(zip(column_names, row))
+    invalid_rows = skipped - failed_writes - identical_writes
 
-                    old_row = table.select_all(
-                        WHERE=(
-                            (table[BLOCKCHAIN] == row_dict[BLOCKCHAIN]) & \
-                            (table[DATA_SOURCE_ID] == row_dict[DATA_SOURCE_ID]) & \
-                            (table[ADDRESS] == row_dict[ADDRESS])
-                        )
-                    )[0]
+    if invalid_rows > 0 and not Config.suppress_chain_address_db_collision_warnings:
+        log.warning(f"Skipped {invalid_rows} '{table_name}' rows with missing required values")
 
-                    msg = f"Address collision for {row_dict[ADDRESS]} ({row_dict[BLOCKCHAIN]}).\n"
-                    msg +="Mismatched cols:\n    "
-                    mismatches = compare_lists(row, old_row, column_names, ['extra_fields'])
+    print_dim(f"Skipped {skipped} '{table_name}' rows ({failed_writes} collisions, {identical_writes} identical rows).")
 
-                    if len(mismatches) > 0:
-                        failed_writes += 1
+    if len(mismatch_counts) > 0:
+        print_dim(f"  Mismatched columns: {', '.join(f'{c} ({n})' for c, n in mismatch_counts.most_common())}")
 
-                        if not Config.suppress_chain_address_db_collision_warnings:
-                            log.warning(msg + mismatches + "\n  (Keeping only original row)")
-                    else:
-                        identical_writes += 1
-                else:
-                    if not Config.suppress_chain_address_db_collision_warnings:
-                        log.warning(f"Skipping because {type(e).__name__} error {e} on row {row}...")
 
-    print_dim(f"Wrote {rows_written} '{table_name}' rows one at a time ({failed_writes} collisions, {identical_writes} identical rows).")
+@contextmanager
+def _bulk_import_pragmas(connection: sqlite3.Connection):
+    """
+    Trade durability for speed while bulk writing (a failed import just gets rerun from the source).
+    The journal mode is left alone: _open_sqlite_connection() puts the DB in WAL mode, which is the fastest
+    journal that is still safe to read during writes.
+    """
+    connection.commit()  # PRAGMA synchronous can't be changed inside a transaction (e.g. a held open DELETE)
+    synchronous = connection.execute('PRAGMA synchronous').fetchone()[0]
+    cache_size = connection.execute('PRAGMA cache_size').fetchone()[0]
+    connection.execute('PRAGMA synchronous = OFF')
+    connection.execute(f"PRAGMA cache_size = {BULK_IMPORT_CACHE_SIZE}")
 
+    try:
+        yield
+    finally:
+        connection.execute(f"PRAGMA synchronous = {synchronous}")
+        connection.execute(f"PRAGMA cache_size = {cache_size}")
 
-# https://stackoverflow.com/questions/71655300/python-sqlite3-how-to-check-if-connection-is-an-in-memory-database
-def _is_connected_to_db_file() -> bool:
-    """Abuse 'pragma database list' to check if connection status real or just in memory."""
-    if not db._db.connection:
-        return False
 
-    log.debug("Checking DB connection status...")
-    local_cursor = db._db.connection.cursor()
-    local_cursor.execute('pragma database_list')
-    connected_to_file = local_cursor.fetchall()[0][2]
-    return connected_to_file is not None and len(connected_to_file) > 0
+def _open_sqlite_connection() -> sqlite3.Connection:
+    """
+    Open a connection (read only if Config.read_only_chain_address_db and the DB exists) tuned for lookups.
+    Any thread can use it (see _connection_lock). A missing DB is created (empty) even in read only mode.
+    """
+    db._db_is_read_only = Config.read_only_chain_address_db and path.isfile(db.CHAIN_ADDRESSES_DB_PATH)
 
+    if Config.read_only_chain_address_db and not db._db_is_read_only:
+        log.warning(f"Chain address DB '{db.CHAIN_ADDRESSES_DB_PATH}' doesn't exist; creating an empty one.")
 
-def _get_or_create_data_source_id(data_source: str) -> int:
-    """Get the data_sources.id, creating a row if necessary."""
-    data_sources = _load_table(DATA_SOURCES_TABLE_NAME)
-    row = next((r for r in data_sources if r[DATA_SOURCE] == data_source), None)
+    if db._db_is_read_only:
+        db_uri = f"{Path(db.CHAIN_ADDRESSES_DB_PATH).resolve().as_uri()}?mode=ro"
+        connection = sqlite3.connect(db_uri, uri=True, check_same_thread=False)
+    else:
+        connection = sqlite3.connect(db.CHAIN_ADDRESSES_DB_PATH, check_same_thread=False)
+        connection.execute('PRAGMA journal_mode = WAL')  # Readers don't block the writer or vice versa
 
-    if row is not None:
-        return row['id']
+    for pragma, value in CONNECTION_PRAGMAS.items():
+        connection.execute(f"PRAGMA {pragma} = {value}")
 
-    with table_connection(DATA_SOURCES_TABLE_NAME) as table:
-        table.insert(data_source=data_source, extracted_at=current_timestamp_iso8601_str())
-        return table.select_all(WHERE=table[DATA_SOURCE] == data_source)[0][0]
+    return connection
 
 
-def _load_table(table_name: str) -> List[Dict[str, Any]]:
-    """Load whole table into list of dicts."""
-    with table_connection(table_name) as table:
-        column_names = table.get_columns_names()
-        rows = table.select_all(ORDER_BY=EXTRACTED_AT)
+def _commit(db_conn: sx.SQLite3x) -> None:
+    """Commit unless Config.skip_load_from_db (big rebuilds are committed when they disconnect bc writing is slow)."""
+    if not Config.skip_load_from_db:
+        db_conn.connection.commit()
 
-    log.debug(f"Table '{table_name}' has columns:\n  {column_names}\nrows: {rows}")
-    return [dict(zip(column_names, row)) for row in rows]
+
+def _get_or_create_data_source_id(data_source: str) -> int:
+    """Get the data_sources.id (from the cache if possible), creating a row if necessary."""
+    if data_source in _data_source_ids:
+        return _data_source_ids[data_source]
+
+    with table_connection(DATA_SOURCES_TABLE_NAME) as table:
+        rows = table.select(SELECT='id', WHERE=table[DATA_SOURCE] == data_source)  # data_source has a unique index
+
+        if len(rows) == 0:
+            table.insert(data_source=data_source, extracted_at=current_timestamp_iso8601_str())
+            rows = table.select(SELECT='id', WHERE=table[DATA_SOURCE] == data_source)
+
+    _data_source_ids[data_source] = rows[0][0]
+    return _data_source_ids[data_source]
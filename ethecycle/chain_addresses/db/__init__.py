@@ -13,3 +13,6 @@ CHAIN_ADDRESSES_DB_PATH = path.join(CHAIN_ADDRESS_DATA_DIR, CHAIN_ADDRESSES_DB_F
 # Not for direct use. Access the DB through methods in wallet_db.py
 # TODO: maybe instantiate without the connection? there's an arg for that i think...
 _db: Optional[sx.SQLite3x] = None
+_db_pid: Optional[int] = None  # Connections can't be shared across processes
+_db_is_read_only: bool = False  # See Config.read_only_chain_address_db
+_verified_db_path: Optional[str] = None  # Tables are only checked once per process
@@ -20,6 +20,14 @@ TOKENS_TABLE_NAME = pluralize(TOKEN)
 DATA_SOURCE_ID = f"{DATA_SOURCE}_id"
 ADDRESS_UNIQUE_INDEX = [DATA_SOURCE_ID, BLOCKCHAIN, ADDRESS]
 
+# Tables holding one row per address per data source have a pre-merged 'coalesced_' version
+COALESCED_TABLE_PREFIX = 'coalesced_'
+# Lower data_source ids were imported first (see rebuild_chain_addresses_db()) and have priority
+SOURCE_PRIORITY_ORDER = f"{DATA_SOURCE_ID}, rowid"
+# The same address on different chains is a different address
+COALESCED_KEY_COLUMNS = [BLOCKCHAIN, ADDRESS]
+NUMERIC_COLUMN_TYPES = [sx.INTEGER, sx.BOOL]
+
 
 @dataclass
 class TableDefinition:
@@ -42,6 +50,54 @@ class TableDefinition:
         console.print(f"Dropping '{self.table_name}'...", style='bright_red')
         db_conn.drop(TABLE=self.table_name, IF_EXIST=True)
 
+    @property
+    def coalesced_table_name(self) -> str:
+        return COALESCED_TABLE_PREFIX + self.table_name
+
+    def create_coalesced_table(self, db_conn: sx.SQLite3x) -> None:
+        """
+        Materialize one row per (blockchain, address) where each column has the value from the highest
+        priority data source that has one. Empty strings, zeros and NULLs count as not having a value.
+        """
+        console.print(f"Building '{self.coalesced_table_name}'...", style='cyan')
+        self.drop_coalesced_table(db_conn)
+        db_conn.execute(script=f"CREATE TABLE {self.coalesced_table_name} AS {self.coalesced_rows_sql()}")
+
+    def coalesced_rows_sql(self) -> str:
+        """SELECT the coalesced row for each (blockchain, address) in the order each one first appeared."""
+        partition_by = ', '.join(COALESCED_KEY_COLUMNS)
+
+        coalesced_columns = [
+            f"FIRST_VALUE({col}) OVER (PARTITION BY {partition_by} ORDER BY {self._missing_value_sql(col)}, "
+            f"{SOURCE_PRIORITY_ORDER}) AS {col}"
+            for col in self.columns.keys() if col not in COALESCED_KEY_COLUMNS
+        ]
+
+        # Keep the row for each address' first appearance
+        return f"""
+            SELECT {', '.join(self.columns.keys())}
+            FROM (
+                SELECT
+                    {partition_by},
+                    {', '.join(coalesced_columns)},
+                    ROW_NUMBER() OVER (PARTITION BY {partition_by} ORDER BY {SOURCE_PRIORITY_ORDER}) AS source_rank,
+                    {DATA_SOURCE_ID} AS first_data_source_id,
+                    rowid AS first_rowid
+                FROM {self.table_name}
+            )
+            WHERE source_rank = 1
+            ORDER BY first_data_source_id, first_rowid
+        """
+
+    def drop_coalesced_table(self, db_conn: sx.SQLite3x) -> None:
+        db_conn.execute(script=f"DROP TABLE IF EXISTS {self.coalesced_table_name}")
+
+    def _missing_value_sql(self, column: str) -> str:
+        """SQL that is 1 if 'column' has no useful value in a row (same as a falsy value in python)."""
+        column_type = self.columns[column] if isinstance(self.columns[column], str) else self.columns[column][0]
+        empty_value = '0' if column_type in NUMERIC_COLUMN_TYPES else "''"
+        return f"NULLIF({column}, {empty_value}) IS NULL"
+
     def _create_index(self, db_conn: sx.SQLite3x, columns: List[str], is_unique: bool = False) -> None:
         """Add (optionally unique) index on columns to table_name."""
         idx_name = '_'.join(['idx', self.table_name] + columns)
@@ -98,3 +154,8 @@ TABLE_DEFINITIONS = [
         unique_indexes=[ADDRESS_UNIQUE_INDEX]
     )
 ]
+
+ADDRESS_TABLE_DEFINITIONS = [
+    table_definition for table_definition in TABLE_DEFINITIONS
+    if table_definition.table_name in [WALLETS_TABLE_NAME, TOKENS_TABLE_NAME]
+]
@@ -11,52 +11,98 @@ TODO: Other possible sources:
     - https://www.bitcoinabuse.com/api/download/forever?api_token={API_TOKEN}
     - Searching for google sheets: 'blockchain addresses site:docs.google.com sheet'
 """
-from ethecycle.chain_addresses.address_db import drop_and_recreate_tables, get_db_connection
+from concurrent.futures import ProcessPoolExecutor
+from importlib import import_module
+from multiprocessing import get_context
+from typing import TYPE_CHECKING, Callable, List
+
+from ethecycle.chain_addresses.address_db import (collected_address_batches, drop_and_recreate_tables,
+     get_db_connection, insert_addresses, refresh_coalesced_tables)
 from ethecycle.config import Config
+from ethecycle.util.logging import console
+
+if TYPE_CHECKING:
+    from ethecycle.models.address import Address
+
+# Importer method => module it's defined in. Modules are only imported when their importer is called
+# (some of them are slow to import). Hand collated results come first so they have priority when
+# loading wallet labels.
+IMPORTERS = {
+    'import_hand_collated_addresses': 'hand_collated_address_importer',
+    'import_hardcoded_addresses': 'hardcoded_addresses_importer',
+    'import_coin_market_cap_repo_addresses': 'coin_market_cap_repo_importer',
+    'import_cryptoscamdb_addresses': 'cryptoscamdb_addresses_importer',
+    'import_defi_llama_addresses': 'defi_llama_importer',
+    'import_ethereum_contract_crawler_addresses': 'etherscan_contract_crawler_importer',
+    'import_ethereum_lists_addresses': 'ethereum_lists_repo_importer',
+    'import_etherscan_labels_repo': 'etherscan_labels_importer',
+    'import_etherscrape_chain_addresses': 'etherscrape_importer',
+    'import_ftx_biggest_trading_partners': 'ftx_major_partners_importer',
+    'import_google_sheets': 'google_sheets_importer',
+    'import_lost_forever_addresses': 'lost_forever_addresses_importer',
+    'import_m_ranger_wallet_tags': 'm_ranger_data_importer',
+    'import_my_ether_wallet_addresses': 'my_ether_wallet_repo_importer',
+    'import_okx_addresses': 'okx_proof_of_reserves_importer',
+    'import_trust_wallet_repo': 'trustwallet_assets_importer',
+    'import_wallets_from_dune': 'wallets_from_dune_importer',
+    'import_w_mcdonald_etherscan_addresses': 'w_mcdonald_etherscan_repo_importer',
+}
 
-from .coin_market_cap_repo_importer import import_coin_market_cap_repo_addresses
-from .cryptoscamdb_addresses_importer import import_cryptoscamdb_addresses
-from .defi_llama_importer import import_defi_llama_addresses
-from .ethereum_lists_repo_importer import import_ethereum_lists_addresses
-from .etherscan_labels_importer import import_etherscan_labels_repo
-from .etherscan_contract_crawler_importer import import_ethereum_contract_crawler_addresses
-from .etherscrape_importer import import_etherscrape_chain_addresses
-from .ftx_major_partners_importer import import_ftx_biggest_trading_partners
-from .google_sheets_importer import import_google_sheets
-from .hand_collated_address_importer import import_hand_collated_addresses
-from .hardcoded_addresses_importer import import_hardcoded_addresses
-from .lost_forever_addresses_importer import import_lost_forever_addresses
-from .m_ranger_data_importer import import_m_ranger_wallet_tags
-from .okx_proof_of_reserves_importer import import_okx_addresses
-from .my_ether_wallet_repo_importer import import_my_ether_wallet_addresses
-from .trustwallet_assets_importer import import_trust_wallet_repo
-from .wallets_from_dune_importer import import_wallets_from_dune
-from .w_mcdonald_etherscan_repo_importer import import_w_mcdonald_etherscan_addresses
-
-
-def rebuild_chain_addresses_db():
-    """Drop all tables and rebuild from source data."""
+
+def rebuild_chain_addresses_db(workers: int = 1):
+    """
+    Drop all tables and rebuild from source data. With more than one worker the importers extract their
+    data in parallel processes and this process writes the results in IMPORTERS (priority) order.
+    """
     Config.skip_load_from_db = True
     drop_and_recreate_tables()
 
-    # Import hand collated results first so they have priority when loading wallet labels
-    import_hand_collated_addresses()
-    import_hardcoded_addresses()
-    import_coin_market_cap_repo_addresses()
-    import_cryptoscamdb_addresses()
-    import_defi_llama_addresses()
-    import_ethereum_contract_crawler_addresses()
-    import_ethereum_lists_addresses()
-    import_etherscan_labels_repo()
-    import_etherscrape_chain_addresses()
-    import_ftx_biggest_trading_partners()
-    import_google_sheets()
-    import_lost_forever_addresses()
-    import_m_ranger_wallet_tags()
-    import_my_ether_wallet_addresses()
-    import_okx_addresses()
-    import_trust_wallet_repo()
-    import_wallets_from_dune()
-    import_w_mcdonald_etherscan_addresses()
+    if workers > 1:
+        _run_importers_in_parallel(workers)
+    else:
+        for importer_method in IMPORTERS:
+            get_importer(importer_method)()
+
+    refresh_coalesced_tables()
     get_db_connection().disconnect()
     Config.skip_load_from_db = False
+
+
+def get_importer(importer_method: str) -> Callable[[], None]:
+    """Import the module that defines 'importer_method' and return the method."""
+    if importer_method not in IMPORTERS:
+        raise ValueError(f"Unknown importer '{importer_method}'")
+
+    return getattr(import_module(f".{IMPORTERS[importer_method]}", __name__), importer_method)
+
+
+def _run_importers_in_parallel(workers: int) -> None:
+    """
+    Importers mostly wait on git clones, downloads and parsing so they run in a process pool. SQLite
+    only has one writer anyway so the workers hand their batches back to be written here, in the same
+    order as a sequential rebuild. Batches are held in memory until it's their turn to be written.
+    """
+    console.print(f"Running {len(IMPORTERS)} importers with {workers} worker processes...", style='bright_cyan')
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=get_context('fork')) as pool:
+        futures = [pool.submit(_extract_addresses, importer_method) for importer_method in IMPORTERS]
+
+        for future in futures:
+            for batch in future.result():
+                insert_addresses(batch)
+
+
+def _extract_addresses(importer_method: str) -> List[List['Address']]:
+    """Run an importer in a worker process, returning what it would have written to the DB."""
+    with collected_address_batches() as batches:
+        get_importer(importer_method)()
+
+    return batches
+
+
+def __getattr__(name: str) -> Callable[[], None]:
+    """Lazy module attributes so 'from ethecycle.chain_addresses.importers import import_xyz' still works."""
+    if name in IMPORTERS:
+        return get_importer(name)
+
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
@@ -6,16 +6,25 @@ IS_TEST_ENV = environ['ETHECYCLE_ENV'] == 'test'
 
 
 class Config:
+    address_filter = None  # Only load txns from/to these addresses if set
+    background_decompression = False
     include_extended_properties = False
+    csv_compression_level = None  # gzip the Neo4j CSVs at this level if set
     debug = DEBUG in environ
+    disk_wallet_registry = False
     drop_database = False
     extract_only = False
+    fast_csv_parser = False
     skip_load_from_db = False
     is_docker_image_build = 'IS_DOCKER_IMAGE_BUILD' in environ
     is_test_env = IS_TEST_ENV
+    max_block_number = None
+    min_block_number = None
     preserve_csvs = False
+    read_only_chain_address_db = False
     suppress_chain_address_db_collision_warnings = False
     skip_decimal_division = True
+    workers = 1
 
     # Hacky way to limit output
     max_rows = 1000 if IS_TEST_ENV else 10000000000
@@ -6,7 +6,7 @@ import time
 from dataclasses import dataclass
 from functools import partial
 from os import path
-from typing import List, Union
+from typing import Any, Dict, List, Union
 
 from bs4 import BeautifulSoup
 from lxml import etree
@@ -15,6 +15,7 @@ from pympler.asizeof import asizeof
 from ethecycle.models.blockchain import get_chain_info
 from ethecycle.config import Config
 from ethecycle.models.transaction import Txn
+from ethecycle.models.transaction_batch import TxnBatch
 from ethecycle.util.logging import console, log
 from ethecycle.util.number_helper import MEGABYTE, size_string
 from ethecycle.util.string_constants import *
@@ -85,6 +86,9 @@ class GraphPropertyManager:
 
 GRAPHML_EXTENSION = '.graph.xml'  # .graphml extension is not recognized by Gremlin
 
+# Wallet address => list of Txns
+WalletTxns = Dict[str, List[Txn]]
+
 # Gremlin puts these props in its exported <graphml> but they don't seem to be necessary
 # (which is good because lxml doesn't like them).
 XML_PROPS = {
@@ -94,9 +98,8 @@ XML_PROPS = {
 }
 
 
-def build_graphml(wallets_txns: WalletTxns, blockchain: str) -> etree._ElementTree:
+def build_graphml(wallets_txns: Union[WalletTxns, TxnBatch], blockchain: str) -> etree._ElementTree:
     """Export txions to GraphML format. Graph ID is 'blockchain'. Returns file written."""
-    all_txns = [txn for txns in wallets_txns.values() for txn in txns]
     chain_info = get_chain_info(blockchain)
     root = etree.Element('graphml')#, **XML_PROPS)
     wallets_already_in_graph_count = 0
@@ -108,9 +111,17 @@ def build_graphml(wallets_txns: WalletTxns, blockchain: str) -> etree._ElementTr
     # Add the <graph>. IMPORTANT: the <key> elements MUST come before the <graph> in the XML.
     graph = etree.SubElement(root, 'graph', **{'id': blockchain, 'edgedefault': 'directed'})
 
-    # Wallets are <node> elements. TODO: wallets still don't label correctly...
-    wallets = set(wallets_txns.keys()).union(set([txn.to_address for txn in all_txns]))
+    if isinstance(wallets_txns, TxnBatch):
+        txn_count = len(wallets_txns)
+        wallets = wallets_txns.addresses()
+        all_txn_properties = wallets_txns.to_dicts(Config.include_extended_properties)
+    else:
+        all_txns = [txn for txns in wallets_txns.values() for txn in txns]
+        txn_count = len(all_txns)
+        wallets = set(wallets_txns.keys()).union(set([txn.to_address for txn in all_txns]))
+        all_txn_properties = (txn.to_properties(Config.include_extended_properties) for txn in all_txns)
 
+    # Wallets are <node> elements. TODO: wallets still don't label correctly...
     for wallet_address in wallets:
         # Commented out because until we have a way to actually totally bisect the graph this is an
         # unnecessary cost.
@@ -126,19 +137,19 @@ def build_graphml(wallets_txns: WalletTxns, blockchain: str) -> etree._ElementTr
             _attribute_xml(wallet, SCANNER_URL, chain_info.scanner_url(wallet_address))
 
     # Transactions are <edge> elements.
-    for txn in all_txns:
-        _add_transaction(graph, txn)
+    for txn_properties in all_txn_properties:
+        _add_transaction(graph, txn_properties)
 
     xml = etree.ElementTree(root)
     console.print(f"Created XML for {len(wallets)} wallet nodes...")
-    console.print(f"Created XML for {len(all_txns)} transaction edges...")
+    console.print(f"Created XML for {txn_count} transaction edges...")
     console.print(f"   Skipped {wallets_already_in_graph_count} wallets already extant in graph...", style='dim')
     console.print(f"   Estimated in memory size of generated XML: {(size_string(_xml_size(xml)))}", style='dim')
     return xml
 
 
 def export_graphml(
-        wallets_txns: WalletTxns,
+        wallets_txns: Union[WalletTxns, TxnBatch],
         blockchain: str,
         output_path: str
     ) -> str:
@@ -175,27 +186,27 @@ def pretty_print_xml_file(xml_file_path: str, force: bool = False) -> None:
     console.print(BeautifulSoup(open(xml_file_path), 'xml').prettify())
 
 
-def _add_transaction(graph_xml: etree._Element, txn: Txn) -> etree._Element:
-    """Add txn as an edge as a sub element of the <graph> xml element."""
-    edge = etree.SubElement(graph_xml, 'edge', **_txn_edge_attribs(txn))
-    txn.labelE = TXN  # Tag with 'labelE' for convenience of upcoming for loop
+def _add_transaction(graph_xml: etree._Element, txn_properties: Dict[str, Any]) -> etree._Element:
+    """Add a txn's properties as an edge as a sub element of the <graph> xml element."""
+    edge = etree.SubElement(graph_xml, 'edge', **_txn_edge_attribs(txn_properties))
+    txn_properties[LABEL_E] = TXN  # Tag with 'labelE' for convenience of upcoming for loop
 
     for edge_property in GraphPropertyManager.edge_properties():
-        property_value = vars(txn)[edge_property.name]
+        property_value = txn_properties.get(edge_property.name)
 
         if property_value:
-            _attribute_xml(edge, edge_property.name, vars(txn)[edge_property.name])
+            _attribute_xml(edge, edge_property.name, property_value)
 
     return edge
 
 
-def _txn_edge_attribs(txn: Txn) -> dict:
+def _txn_edge_attribs(txn_properties: Dict[str, Any]) -> dict:
     """Get the edge properties for a transaction."""
     return {
-        'id': txn.transaction_id,
+        'id': txn_properties['transaction_id'],
         'label': TXN,
-        'source': txn.from_address,
-        'target': txn.to_address,
+        'source': txn_properties[FROM_ADDRESS],
+        'target': txn_properties[TO_ADDRESS],
     }
 
 
@@ -8,26 +8,38 @@ Data types: int, long, float, double, boolean, byte, short, char, string, point,
             localtime, time, localdatetime, datetime, duration
 """
 import time
-from os import path
-from typing import List, Type, Union
+from itertools import count
+from os import getpid, path
+from typing import List, Optional, Union
 
+from ethecycle.config import Config
+from ethecycle.export.wallet_registry import WalletRegistry
 from ethecycle.models.transaction import NEO4J_TXN_CSV_HEADER, Txn
+from ethecycle.models.transaction_batch import TxnBatch
 from ethecycle.models.wallet import NEO4J_WALLET_CSV_HEADER, Wallet
 from ethecycle.util.csv_helper import write_list_of_lists_to_csv
-from ethecycle.util.filesystem_helper import OUTPUT_DIR, timestamp_for_filename
+from ethecycle.util.filesystem_helper import GZIP_EXTENSION, OUTPUT_DIR, timestamp_for_filename
 from ethecycle.util.logging import print_benchmark
 from ethecycle.util.neo4j_helper import EDGE_LABEL, HEADER, NODE_LABEL
+from ethecycle.util.string_constants import MISSING_ADDRESS
+
+# Appended to CSV filenames (along with the PID) so chunks written in the same second by the
+# same or different worker processes don't overwrite each other.
+CSV_FILE_COUNTER = count()
 
 
 class Neo4jCsvs:
-    def __init__(self, txns: Union[List[Txn], str]) -> None:
+    def __init__(self, txns: Union[List[Txn], TxnBatch, str], wallet_registry: Optional[WalletRegistry] = None) -> None:
         """
         Generate Neo4j CSV files for the Neo4j bulk loader.
         If 'txns' is the string 'header' the CSVs are single row header files.
-        If 'txns' is a list of Txns the CSVs will contain the wallet/txn information about those txns.
+        If 'txns' is a list of Txns or a TxnBatch the CSVs will contain the wallet/txn information about those txns.
+        If 'wallet_registry' is provided wallets it has already seen are left out of the wallet CSV.
         """
-        csv_basename = HEADER if txns == HEADER else timestamp_for_filename()
-        build_csv_path = lambda label: path.join(OUTPUT_DIR, f"{label}_{csv_basename}.csv")
+        csv_basename = HEADER if txns == HEADER else f"{timestamp_for_filename()}_{getpid()}_{next(CSV_FILE_COUNTER):05d}"
+        # neo4j-admin reads gzipped CSVs. Header files are tiny so they are never compressed.
+        extension = '.csv' if txns == HEADER or Config.csv_compression_level is None else f".csv{GZIP_EXTENSION}"
+        build_csv_path = lambda label: path.join(OUTPUT_DIR, f"{label}_{csv_basename}{extension}")
         self.wallet_csv_path = build_csv_path(NODE_LABEL)
         self.txn_csv_path = build_csv_path(EDGE_LABEL)
 
@@ -35,19 +47,36 @@ class Neo4jCsvs:
             self._write_header_csvs()
         else:
             # Don't make txns a property of the instance (pass them as arg) so GC can reclaim the memory later.
-            self._write_txn_and_wallet_csvs(txns)
+            self._write_txn_and_wallet_csvs(txns, wallet_registry)
 
         self.generated_csvs = [self.wallet_csv_path, self.txn_csv_path]
 
-    def _write_txn_and_wallet_csvs(self, txns: List[Txn]) -> None:
+    def _write_txn_and_wallet_csvs(self, txns: Union[List[Txn], TxnBatch], wallet_registry: Optional[WalletRegistry]) -> None:
         """Break out wallets and txions into two CSV files for nodes and edges for Neo4j bulk loader."""
-        # Wallet nodes
         start_time = time.perf_counter()
-        self._write_csv(self.wallet_csv_path, Wallet.extract_wallets_from_transactions(txns))
+
+        if isinstance(txns, TxnBatch):
+            addresses = txns.addresses()
+            blockchain, extracted_at = txns.blockchain, txns.extracted_at
+            txn_rows = txns.to_neo4j_csv_rows()
+        else:
+            addresses = set(t.from_address for t in txns).union(t.to_address for t in txns)
+            blockchain, extracted_at = txns[0].blockchain, txns[0].extracted_at
+            txn_rows = (txn.to_neo4j_csv_row() for txn in txns)
+
+        addresses.add(MISSING_ADDRESS)
+        addresses.discard('')
+
+        if wallet_registry is not None:
+            addresses = wallet_registry.register(addresses)
+
+        # Wallet nodes
+        wallet_rows = Wallet.neo4j_csv_rows_for_addresses(addresses, blockchain, extracted_at)
+        write_list_of_lists_to_csv(self.wallet_csv_path, wallet_rows, Config.csv_compression_level)
         duration_from_start = print_benchmark('Wrote wallet CSV', start_time, indent_level=2)
 
         # Transaction edges
-        self._write_csv(self.txn_csv_path, txns)
+        write_list_of_lists_to_csv(self.txn_csv_path, txn_rows, Config.csv_compression_level)
         print_benchmark('Wrote txn CSV', start_time + duration_from_start, indent_level=2)
 
     # NOTE: Had bizarre issues with this on macOS... removed WALLET_header.csv but could not write to
@@ -57,7 +86,3 @@ class Neo4jCsvs:
         """Write single row CSVs with header info for nodes and edges."""
         write_list_of_lists_to_csv(self.txn_csv_path, [NEO4J_TXN_CSV_HEADER])
         write_list_of_lists_to_csv(self.wallet_csv_path, [NEO4J_WALLET_CSV_HEADER])
-
-    def _write_csv(self, csv_path: str, objs: Union[List[Txn], List[Wallet]]) -> None:
-        """Write objs to csv_path"""
-        write_list_of_lists_to_csv(csv_path, [obj.to_neo4j_csv_row() for obj in objs])
@@ -0,0 +1,95 @@
+"""
+Load-wide record of which wallet addresses have already been written to a Neo4j wallet CSV so that
+each address is labeled and emitted once per load instead of once per source CSV (or chunk).
+"""
+import sqlite3
+from os import getpid, path, remove
+from typing import Iterable, Optional, Set
+
+from ethecycle.util.filesystem_helper import OUTPUT_DIR, timestamp_for_filename
+from ethecycle.util.logging import log
+
+# How long a worker will wait for another worker's registry transaction to finish
+SQLITE_LOCK_TIMEOUT_SECONDS = 600
+
+
+class WalletRegistry:
+    """In memory registry. Only usable within a single process."""
+
+    def __init__(self) -> None:
+        self._seen_addresses: Set[str] = set()
+
+    def register(self, addresses: Iterable[str]) -> Set[str]:
+        """Record 'addresses' as seen and return the ones that had not been seen before."""
+        new_addresses = set(addresses).difference(self._seen_addresses)
+        self._seen_addresses.update(new_addresses)
+        return new_addresses
+
+    def close(self) -> None:
+        self._seen_addresses = set()
+
+    def __len__(self) -> int:
+        return len(self._seen_addresses)
+
+
+class DiskWalletRegistry(WalletRegistry):
+    """
+    Registry backed by a scratch sqlite DB. Keeps very large address sets out of memory and can be
+    shared by worker processes (each process opens its own connection to the same file).
+    """
+
+    def __init__(self, db_path: Optional[str] = None) -> None:
+        self.db_path = db_path or path.join(OUTPUT_DIR, f"wallet_registry_{timestamp_for_filename()}_{getpid()}.db")
+        self._connection: Optional[sqlite3.Connection] = None
+        self._connection_pid: Optional[int] = None
+        self._connect().execute('CREATE TABLE IF NOT EXISTS seen_addresses (address TEXT PRIMARY KEY) WITHOUT ROWID')
+
+    def register(self, addresses: Iterable[str]) -> Set[str]:
+        """Record 'addresses' as seen and return the ones that had not been seen before (atomic across processes)."""
+        connection = self._connect()
+        connection.execute('BEGIN IMMEDIATE')
+
+        try:
+            connection.execute('DELETE FROM batch_addresses')
+            connection.executemany('INSERT OR IGNORE INTO batch_addresses VALUES (?)', ((a,) for a in addresses))
+
+            new_addresses = set(row[0] for row in connection.execute(
+                'SELECT address FROM batch_addresses WHERE address NOT IN (SELECT address FROM seen_addresses)'
+            ))
+
+            connection.executemany('INSERT INTO seen_addresses VALUES (?)', ((a,) for a in new_addresses))
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+
+        return new_addresses
+
+    def close(self) -> None:
+        """Close the connection and delete the scratch DB."""
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+        for db_file in [self.db_path + suffix for suffix in ['', '-wal', '-shm']]:
+            if path.exists(db_file):
+                log.debug(f"Deleting wallet registry DB file: {db_file}")
+                remove(db_file)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Connections can't cross process boundaries so (re)connect if we're in a new process."""
+        if self._connection is None or self._connection_pid != getpid():
+            self._connection = sqlite3.connect(self.db_path, timeout=SQLITE_LOCK_TIMEOUT_SECONDS, isolation_level=None)
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute('PRAGMA synchronous=OFF')
+            self._connection.execute('CREATE TEMP TABLE batch_addresses (address TEXT PRIMARY KEY) WITHOUT ROWID')
+            self._connection_pid = getpid()
+
+        return self._connection
+
+    def __getstate__(self) -> dict:
+        """Only the DB path is pickled when the registry is handed to a worker process."""
+        return {'db_path': self.db_path, '_connection': None, '_connection_pid': None}
+
+    def __len__(self) -> int:
+        return self._connect().execute('SELECT COUNT(*) FROM seen_addresses').fetchone()[0]
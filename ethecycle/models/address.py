@@ -2,26 +2,35 @@
 Base class for Token, Wallet, and anything else with a blockchain address
 """
 from collections import defaultdict
-from dataclasses import dataclass
+import sys
+from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Any, ClassVar, Dict, Iterator, List, Optional, Type, Union
 
 from inflection import pluralize, titleize, underscore
 
 from ethecycle.blockchains.chain_info import ChainInfo
-from ethecycle.chain_addresses.address_db import table_connection, coalesce_rows
+from ethecycle.chain_addresses.address_db import load_with_snapshot, select_coalesced_rows
 from ethecycle.models.blockchain import get_chain_info
+from ethecycle.util.cache_helper import LookupCache
 from ethecycle.util.logging import console, log, print_dim
 from ethecycle.util.string_helper import strip_and_set_empty_string_to_none
 from ethecycle.util.string_constants import *
 
 # TODO: this is a hack
-COLUMNS_TO_NOT_LOAD = ['chain_info', 'data_source']
+COLUMNS_TO_NOT_LOAD = ['chain_info', 'data_source', 'data_source_id']
+# Low cardinality columns whose values are interned when loading so every row shares the same string objects
+INTERNED_COLUMNS = [BLOCKCHAIN, CATEGORY, 'organization', EXTRACTED_AT]
 MAX_LABEL_LENGTH = 250
 CASE_SENSITIVE_BLOCKCHAINS = ['bitcoin', 'solana']
 
 
-@dataclass(kw_only=True)
+def normalize_address(blockchain: str, address: str) -> str:
+    """Addresses are stored and looked up lowercased except on CASE_SENSITIVE_BLOCKCHAINS."""
+    return address if blockchain in CASE_SENSITIVE_BLOCKCHAINS else address.lower()
+
+
+@dataclass(kw_only=True, slots=True)
 class Address:
     address: Optional[str] = None  # Some CMC data has no addresses...
     blockchain: Optional[str] = None
@@ -32,6 +41,7 @@ class Address:
     data_source: Optional[str] = None
     extracted_at: Optional[Union[datetime, str]] = None
     comment: Optional[str] = None
+    data_source_id: Optional[int] = field(default=None, repr=False)  # Set when writing to the DB
 
     # TODO: why doesn't this work
     # https://stackoverflow.com/questions/67955425/how-to-add-the-class-instance-to-a-class-variable-in-dataclass-notation
@@ -72,28 +82,20 @@ class Address:
         """Lazy load records from the database and activate _after_load_callback()."""
         if not cls.has_loaded_data_from_chain_address_db:
             print_dim(f"Loading '{cls.__name__}' chain address data...")
-            cls._by_blockchain_address = defaultdict(lambda: dict())
-            column_names = [c for c in cls.__dataclass_fields__.keys() if c not in COLUMNS_TO_NOT_LOAD]
-
-            with table_connection(pluralize(cls.__name__.lower())) as table:
-                db_rows = table.select_all(SELECT=column_names) # , WHERE=table[BLOCKCHAIN] == blockchain)
-
-            db_rows = [dict(zip(column_names, row)) for row in db_rows]
-            objs = [cls(**row) for row in coalesce_rows(db_rows)]
-
-            for obj in objs:
-                if not obj.blockchain or not obj.address:
-                    log.debug(f"Skipping obj w/insufficient data: {obj}...")
-                    continue
-
-                cls._by_blockchain_address[obj.blockchain][obj.address] = obj
-
-            cls._after_load_callback()
+            by_blockchain_address = load_with_snapshot(cls._table_name(), cls._load_from_db)
+            cls.set_chain_addresses(by_blockchain_address)
             console.print("    Complete!", style='green dim')
-            cls.has_loaded_data_from_chain_address_db = True
 
         return cls._by_blockchain_address
 
+    @classmethod
+    def set_chain_addresses(cls, by_blockchain_address: Dict[str, Dict[str, 'Address']]) -> None:
+        """Use already loaded data (e.g. passed to a worker process) instead of loading from the DB."""
+        cls._by_blockchain_address = defaultdict(lambda: dict(), by_blockchain_address)
+        cls._address_lookup_cache = LookupCache()
+        cls._after_load_callback()
+        cls.has_loaded_data_from_chain_address_db = True
+
     @classmethod
     def name_at_address(cls, blockchain: str, address: str) -> Optional[str]:
         """Get the name at a given 'address' on a given 'blockchain'."""
@@ -107,20 +109,50 @@ class Address:
     @classmethod
     def get_address_property(cls, blockchain: str, address: str, property: str) -> Optional[Any]:
         """Get named property if there's an object at the 'address'."""
-        address_obj = cls.at_address(blockchain, address)
+        return getattr(cls.at_address(blockchain, address), property, None)
 
-        if address_obj is None or property not in dir(address_obj):
-            return None
+    @classmethod
+    def at_address(cls, blockchain: str, address: str) -> Optional['Address']:
+        """Get the object at 'address' if there is one. Results (including misses) are memoized."""
+        cls.chain_addresses()  # Ensures data is loaded from DB
+        return cls._address_lookup_cache.get_or_compute((blockchain, address), cls._find_at_address, blockchain, address)
 
-        return getattr(address_obj, property)
+    @classmethod
+    def address_lookup_cache(cls) -> LookupCache:
+        """The memoization cache used by at_address() (exposes hit / miss counts)."""
+        cls.chain_addresses()
+        return cls._address_lookup_cache
 
     @classmethod
-    def at_address(cls, blockchain: str, address: str) -> Optional['Address']:
-        """Get named property if there's an object at the 'address'."""
-        if blockchain not in CASE_SENSITIVE_BLOCKCHAINS:
-            address = address.lower()
+    def _find_at_address(cls, blockchain: str, address: str) -> Optional['Address']:
+        """Uncached lookup for at_address()."""
+        blockchain = blockchain.lower()
+        return cls._by_blockchain_address[blockchain].get(normalize_address(blockchain, address))
+
+    @classmethod
+    def _load_from_db(cls) -> Dict[str, Dict[str, 'Address']]:
+        """Read the coalesced rows for each address and key them by blockchain and normalized address."""
+        by_blockchain_address = defaultdict(lambda: dict())
+        column_names = [c for c in cls.__dataclass_fields__.keys() if c not in COLUMNS_TO_NOT_LOAD]
+
+        db_rows = select_coalesced_rows(cls._table_name(), column_names)
+        _intern_strings(db_rows, [col for col in INTERNED_COLUMNS if col in column_names])
+        objs = [cls(**row) for row in db_rows]
+
+        for obj in objs:
+            if not obj.blockchain or not obj.address:
+                log.debug(f"Skipping obj w/insufficient data: {obj}...")
+                continue
 
-        return cls.chain_addresses()[blockchain.lower()].get(address.lower())
+            key = normalize_address(obj.blockchain, obj.address)
+            # Reuse the address string as the key if normalizing didn't change it (lower() makes a copy)
+            by_blockchain_address[obj.blockchain][obj.address if key == obj.address else key] = obj
+
+        return dict(by_blockchain_address)  # defaultdict's lambda can't be pickled
+
+    @classmethod
+    def _table_name(cls) -> str:
+        return pluralize(cls.__name__.lower())
 
     @classmethod
     def _after_load_callback(cls):
@@ -128,4 +160,12 @@ class Address:
         pass
 
 
+def _intern_strings(rows: List[Dict[str, Any]], columns: List[str]) -> None:
+    """Replace string values in 'columns' with interned copies (in place)."""
+    for row in rows:
+        for col in columns:
+            if isinstance(row[col], str):
+                row[col] = sys.intern(row[col])
+
+
 Address.has_loaded_data_from_chain_address_db = False
@@ -5,19 +5,25 @@ on-chain address.
 from collections import defaultdict
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Any, Dict, Optional, Union
+from typing import Any, Collection, Dict, FrozenSet, Optional, Set, Tuple, Type, Union
 
 from rich.text import Text
 
-from ethecycle.models.address import Address
+from ethecycle.models.address import Address, normalize_address
 from ethecycle.util.logging import console, log
-from ethecycle.util.string_constants import SYMBOL
 from ethecycle.util.string_helper import strip_and_set_empty_string_to_none
 
 DEFAULT_DECIMALS = 0
+UNKNOWN_TOKEN = (None, DEFAULT_DECIMALS)
 
+# Normalized token address => (symbol, decimals)
+TokenLookupTable = Dict[str, Tuple[Optional[str], int]]
 
-@dataclass(kw_only=True)
+# A token symbol or address or a collection of them (None means no filter)
+TokenFilter = Optional[Union[str, Collection[str]]]
+
+
+@dataclass(kw_only=True, slots=True)
 class Token(Address):
     symbol: str
     name: str
@@ -32,7 +38,7 @@ class Token(Address):
 
     def __post_init__(self):
         """Minor data cleanup"""
-        super().__post_init__()
+        super(Token, self).__post_init__()  # Zero arg super() doesn't work in slots dataclasses
 
         if self.token_type is not None:
             self.token_type = strip_and_set_empty_string_to_none(self.token_type)
@@ -57,19 +63,71 @@ class Token(Address):
 
         return chain_addresses[token_symbol].address
 
+    @classmethod
+    def configured_symbols(cls) -> Set[str]:
+        """All the token symbols configured for any blockchain."""
+        cls.chain_addresses()  # Ensures data is loaded from DB
+        return set(symbol for chain_symbols in cls._by_blockchain_symbol.values() for symbol in chain_symbols.keys())
+
+    @classmethod
+    def filter_addresses(cls, chain_info: Type['ChainInfo'], token: TokenFilter) -> Optional[FrozenSet[str]]:
+        """
+        Resolve 'token' (symbols and/or addresses) to the set of (normalized) token addresses whose txns
+        should be kept. Returns None if there's nothing to filter on.
+        """
+        if not token:
+            return None
+
+        cls.chain_addresses()  # Ensures data is loaded from DB
+        blockchain = chain_info.chain_string()
+        tokens_by_symbol = cls._by_blockchain_symbol[blockchain]
+        token_addresses = set()
+
+        for symbol_or_address in ([token] if isinstance(token, str) else token):
+            if symbol_or_address in tokens_by_symbol:
+                token_addresses.add(normalize_address(blockchain, tokens_by_symbol[symbol_or_address].address))
+            elif chain_info.is_valid_address(symbol_or_address):
+                token_addresses.add(normalize_address(blockchain, symbol_or_address))
+            else:
+                raise ValueError(f"'{symbol_or_address}' is not a known token symbol or a valid {blockchain} address")
+
+        return frozenset(token_addresses)
+
     @classmethod
     def token_symbol(cls, blockchain: str, token_address: str) -> Optional[str]:
         """Reverse lookup - takes an address, returns a symbol"""
-        return cls.get_address_property(blockchain, token_address, SYMBOL)
+        return cls.symbol_and_decimals(blockchain, token_address)[0]
 
     @classmethod
     def token_decimals(cls, blockchain: str, token_address: str) -> int:
         """Returns number of decimals in token at this 'token_address'."""
-        return cls.get_address_property(blockchain, token_address, 'decimals') or DEFAULT_DECIMALS
+        return cls.symbol_and_decimals(blockchain, token_address)[1]
+
+    @classmethod
+    def symbol_and_decimals(cls, blockchain: str, token_address: str) -> Tuple[Optional[str], int]:
+        """Get (symbol, decimals) for the token at 'token_address' with a single lookup."""
+        return cls.lookup_table(blockchain).get(normalize_address(blockchain, token_address), UNKNOWN_TOKEN)
+
+    @classmethod
+    def lookup_table(cls, blockchain: str) -> TokenLookupTable:
+        """Compact address => (symbol, decimals) table for 'blockchain', built the first time it's needed."""
+        if blockchain not in cls._lookup_tables:
+            cls._lookup_tables[blockchain] = {
+                normalize_address(blockchain, address): (token.symbol, token.decimals or DEFAULT_DECIMALS)
+                for address, token in cls.chain_addresses()[blockchain].items()
+            }
+
+        return cls._lookup_tables[blockchain]
+
+    @classmethod
+    def set_lookup_table(cls, blockchain: str, lookup_table: TokenLookupTable) -> None:
+        """Use a table built elsewhere (e.g. passed to a worker process) instead of building one."""
+        cls._lookup_tables[blockchain] = lookup_table
 
     @classmethod
     def _after_load_callback(cls) -> None:
         """Build the symbols to tokens dict (_by_blockchain_symbol) for each chain."""
+        cls._lookup_tables = {}
         cls._by_blockchain_symbol = defaultdict(lambda: dict())
 
         for blockchain, token_addresses in cls._by_blockchain_address.items():
@@ -86,3 +144,6 @@ class Token(Address):
         txt = Text('').append(self.symbol, 'bright_green').append(f" (").append(self.address, style='grey')
         txt.append(f") ").append(self.name, 'cyan').append(f" {self.blockchain}", 'bytes')
         return txt
+
+
+Token._lookup_tables = {}
@@ -1,19 +1,20 @@
 import csv
-import gzip
 import io
 from collections import defaultdict
-from dataclasses import dataclass
+from dataclasses import dataclass, field, replace
 from datetime import datetime
-from typing import List, Optional, Type, Union
+from itertools import compress, islice
+from typing import Any, AnyStr, Dict, FrozenSet, Iterator, List, Optional, Type, Union
 
 from rich.pretty import pprint
 from rich.text import Text
 
 from ethecycle.blockchains.chain_info import ChainInfo
 from ethecycle.config import Config
-from ethecycle.models.token import Token
+from ethecycle.models.address import CASE_SENSITIVE_BLOCKCHAINS
+from ethecycle.models.token import Token, TokenFilter
 from ethecycle.util.string_constants import *
-from ethecycle.util.filesystem_helper import GZIP_EXTENSION
+from ethecycle.util.filesystem_helper import GZIP_EXTENSION, ByteRange, mmapped_line_chunks, open_text_lines
 
 # Expected column order for source CSVs.
 RAW_TXN_DATA_CSV_COLS = [
@@ -47,36 +48,151 @@ NEO4J_RELATIONSHIP_COLS = {
 NEO4J_TXN_CSV_HEADER = [NEO4J_RELATIONSHIP_COLS.get(col, col) for col in NEO4J_TXN_CSV_COLS]
 NEO4J_TXN_CSV_COLUMN_NAMES = [col.split(':')[0] for col in NEO4J_TXN_CSV_COLS]
 
+# Max number of Txn objects held in memory at once when streaming a source CSV
+TXNS_PER_CHUNK = 250000
 
-@dataclass
+# Marks a lazily computed Txn property whose value can legitimately be None as not yet computed
+NOT_COMPUTED = object()
+
+# Positions of the columns the readers filter on
+TOKEN_ADDRESS_IDX, FROM_ADDRESS_IDX, TO_ADDRESS_IDX, BLOCK_NUMBER_IDX = [
+    RAW_TXN_DATA_CSV_COLS.index(col) for col in [TOKEN_ADDRESS, FROM_ADDRESS, TO_ADDRESS, BLOCK_NUMBER]
+]
+
+
+@dataclass(frozen=True)
+class RawTxnFilter:
+    """
+    Predicates evaluated against raw source CSV fields (str or bytes) before any Txn objects are built.
+    Fields left as None don't filter anything. The address sets hold bytes in encoded() copies. Address
+    sets must be normalized (see normalize_address()); the source fields are lowercased before they're
+    compared unless 'case_sensitive' is set.
+    """
+    token_addresses: Optional[FrozenSet[str]] = None
+    min_block_number: Optional[int] = None
+    max_block_number: Optional[int] = None
+    addresses: Optional[FrozenSet[str]] = None  # Keep txns from or to any of these
+    case_sensitive: bool = False  # Not a predicate; says how addresses are compared
+
+    @classmethod
+    def build(cls, chain_info: Type['ChainInfo'], token: TokenFilter) -> 'RawTxnFilter':
+        """Resolve 'token' and combine it with the block range and address filters in Config."""
+        return cls(
+            token_addresses=Token.filter_addresses(chain_info, token),
+            min_block_number=Config.min_block_number,
+            max_block_number=Config.max_block_number,
+            addresses=Config.address_filter,
+            case_sensitive=chain_info.chain_string() in CASE_SENSITIVE_BLOCKCHAINS
+        )
+
+    def is_empty(self) -> bool:
+        return all(getattr(self, name) is None for name in self.__dataclass_fields__ if name != 'case_sensitive')
+
+    def encoded(self) -> 'RawTxnFilter':
+        """Copy of this filter that works on undecoded bytes fields."""
+        encode = lambda strings: None if strings is None else frozenset(s.encode() for s in strings)
+        return replace(self, token_addresses=encode(self.token_addresses), addresses=encode(self.addresses))
+
+    def keep_row(self, row: List[str]) -> bool:
+        """True if the row passes all the predicates."""
+        if self.token_addresses is not None and self._normalize(row[TOKEN_ADDRESS_IDX]) not in self.token_addresses:
+            return False
+        elif self.addresses is not None \
+                and self._normalize(row[FROM_ADDRESS_IDX]) not in self.addresses \
+                and self._normalize(row[TO_ADDRESS_IDX]) not in self.addresses:
+            return False
+        elif self.min_block_number is None and self.max_block_number is None:
+            return True
+
+        block_number = int(row[BLOCK_NUMBER_IDX])
+
+        if self.min_block_number is not None and block_number < self.min_block_number:
+            return False
+
+        return self.max_block_number is None or block_number <= self.max_block_number
+
+    def keep_mask(self, columns: List[List[AnyStr]]) -> List[bool]:
+        """Column oriented keep_row(): one bool per row."""
+        conditions = []
+
+        if self.token_addresses is not None:
+            conditions.append(map(self.token_addresses.__contains__, self._normalized(columns[TOKEN_ADDRESS_IDX])))
+        if self.addresses is not None:
+            from_or_to = zip(self._normalized(columns[FROM_ADDRESS_IDX]), self._normalized(columns[TO_ADDRESS_IDX]))
+            conditions.append(from_addr in self.addresses or to_addr in self.addresses for from_addr, to_addr in from_or_to)
+        if self.min_block_number is not None or self.max_block_number is not None:
+            min_block = -1 if self.min_block_number is None else self.min_block_number
+            max_block = float('inf') if self.max_block_number is None else self.max_block_number
+            conditions.append(min_block <= int(n) <= max_block for n in columns[BLOCK_NUMBER_IDX])
+
+        return [all(row_conditions) for row_conditions in zip(*conditions)]
+
+    def _normalize(self, address: AnyStr) -> AnyStr:
+        return address if self.case_sensitive else address.lower()
+
+    def _normalized(self, column: List[AnyStr]) -> List[AnyStr]:
+        """Column oriented _normalize()."""
+        return column if self.case_sensitive else [address.lower() for address in column]
+
+
+@dataclass(slots=True)
 class Txn():
     token_address: str
     from_address: str
     to_address: str
     csv_value: str  # num_tokens
     transaction_hash: str
-    block_number: int
     log_index: str
+    block_number: int
     chain_info: Type
     extracted_at: Optional[Union[datetime, str]] = None
+    # Computed in __post_init__()
+    blockchain: str = field(init=False, repr=False)
+    symbol: Optional[str] = field(init=False, repr=False)
+    num_tokens: float = field(init=False, repr=False)
+    # Storage for the lazily computed properties below
+    _transaction_id: Optional[str] = field(default=None, init=False, repr=False)
+    _num_tokens_str: Optional[str] = field(default=None, init=False, repr=False)
+    _scanner_url: Optional[str] = field(default=NOT_COMPUTED, init=False, repr=False)  # None is a valid value
 
     def __post_init__(self):
-        """Some txns have multiple internal transfers so append log_index to achieve a unique ID."""
+        """Only the fields that go into the Neo4j CSVs are computed up front."""
         self.blockchain = self.chain_info.chain_string()
-        self.transaction_id = f"{self.transaction_hash}-{self.log_index}"
-        self.symbol = Token.token_symbol(self.blockchain, self.token_address)
+        self.symbol, decimals = Token.symbol_and_decimals(self.blockchain, self.token_address)
         self.num_tokens = float(self.csv_value)
 
         if not Config.skip_decimal_division:
-            self.num_tokens /= 10 ** Token.token_decimals(self.blockchain, self.token_address)
+            self.num_tokens /= 10 ** decimals
 
-        self.num_tokens_str = "{:,.18f}".format(self.num_tokens)
         self.block_number = int(self.block_number)
-        self.scanner_url = self.chain_info.scanner_url(self.transaction_hash)
 
         if isinstance(self.extracted_at, datetime):
             self.extracted_at = self.extracted_at.replace(microsecond=0).isoformat()
 
+    @property
+    def transaction_id(self) -> str:
+        """Some txns have multiple internal transfers so append log_index to achieve a unique ID."""
+        if self._transaction_id is None:
+            self._transaction_id = f"{self.transaction_hash}-{self.log_index}"
+
+        return self._transaction_id
+
+    @property
+    def num_tokens_str(self) -> str:
+        """Display only."""
+        if self._num_tokens_str is None:
+            self._num_tokens_str = "{:,.18f}".format(self.num_tokens)
+
+        return self._num_tokens_str
+
+    @property
+    def scanner_url(self) -> Optional[str]:
+        """Display / extended GraphML export only."""
+        if self._scanner_url is NOT_COMPUTED:
+            self._scanner_url = self.chain_info.scanner_url(self.transaction_hash)
+
+        return self._scanner_url
+
     def to_neo4j_csv_row(self) -> List[Optional[str]]:
         """Generate Neo4J bulk load CSV row."""
         row = []
@@ -87,32 +203,46 @@ class Txn():
 
         return row
 
+    def to_properties(self, include_scanner_url: bool = False) -> Dict[str, Any]:
+        """Dict of properties (same keys as TxnBatch.to_dicts()), optionally including the scanner_url."""
+        properties = {col: getattr(self, col) for col in NEO4J_TXN_CSV_COLUMN_NAMES + [TRANSACTION_HASH]}
+
+        if include_scanner_url:
+            properties[SCANNER_URL] = self.scanner_url
+
+        return properties
+
     @classmethod
     def extract_from_csv(
             cls,
             csv_path: str,
             chain_info: Type['ChainInfo'],
             extracted_at: str,
-            token: Optional['str']
+            token: TokenFilter
         ) -> List['Txn']:
         """Load txions from a headerless CSV to list of Txn objects."""
-        if csv_path.endswith(GZIP_EXTENSION):
-            with gzip.open(csv_path, 'rt') as zipfile:
-                txns = [Txn(*(row + [chain_info])) for row in csv.reader(zipfile, delimiter='|')]
-        else:
-            with open(csv_path, newline='') as csvfile:
-                txns = [Txn(*(row + [chain_info])) for row in csv.reader(csvfile, delimiter='|')]
-
-        # Fill in extracted_at so all records in same job have same timestamp
-        for txn in txns:
-            txn.extracted_at = extracted_at
-
-        # Optionally filter for a single token symbol
-        if token:
-            token_address = Token.token_address(chain_info.chain_string(), token)
-            txns = [txn for txn in txns if txn.token_address == token_address]
+        return [
+            txn
+            for txns in cls.extract_chunks_from_csv(csv_path, chain_info, extracted_at, token)
+            for txn in txns
+        ]
 
-        return txns
+    @classmethod
+    def extract_chunks_from_csv(
+            cls,
+            csv_path: str,
+            chain_info: Type['ChainInfo'],
+            extracted_at: str,
+            token: TokenFilter,
+            chunk_size: int = TXNS_PER_CHUNK
+        ) -> Iterator[List['Txn']]:
+        """
+        Stream txions from a headerless CSV as lists of at most 'chunk_size' Txn objects. If 'token'
+        is provided rows for other tokens are dropped before any Txn objects are built.
+        """
+        for rows in read_raw_txn_rows(csv_path, chain_info, token, chunk_size):
+            # All records in same job have same extracted_at timestamp
+            yield [cls(*row, chain_info, extracted_at) for row in rows]
 
     @classmethod
     def count_col_vals(cls, txns: List['Txn'], col: str) -> None:
@@ -134,3 +264,109 @@ class Txn():
 
     def __eq__(self, other: 'Txn'):
         return self.transaction_id == other.transaction_id
+
+
+def read_raw_txn_rows(
+        csv_path: str,
+        chain_info: Type['ChainInfo'],
+        token: TokenFilter,
+        chunk_size: int = TXNS_PER_CHUNK,
+        byte_range: Optional[ByteRange] = None
+    ) -> Iterator[List[List[str]]]:
+    """
+    Yield lists of at most 'chunk_size' raw rows (in RAW_TXN_DATA_CSV_COLS order) from a headerless
+    source CSV, skipping rows for tokens other than 'token' (a symbol or address or a collection of them)
+    if it's provided as well as rows outside of the block range / address filters in Config (see RawTxnFilter).
+    The filters are applied to the raw fields. If 'byte_range' is provided only the lines in that part of
+    the file are read.
+    """
+    txn_filter = RawTxnFilter.build(chain_info, token)
+    keep_row = None if txn_filter.is_empty() else txn_filter.keep_row
+    rows = []
+
+    with open_text_lines(csv_path, byte_range) as lines:
+        for row in csv.reader(lines, delimiter='|'):
+            if keep_row is not None and not keep_row(row):
+                continue
+
+            rows.append(row)
+
+            if len(rows) == chunk_size:
+                yield rows
+                rows = []
+
+    if len(rows) > 0:
+        yield rows
+
+
+def read_raw_txn_columns(
+        csv_path: str,
+        chain_info: Type['ChainInfo'],
+        token: TokenFilter,
+        chunk_size: int = TXNS_PER_CHUNK,
+        byte_range: Optional[ByteRange] = None
+    ) -> Iterator[List[List[str]]]:
+    """
+    Fast alternative to read_raw_txn_rows() for source CSVs in exactly the standard format (RAW_TXN_DATA_CSV_COLS,
+    pipe delimited, no quoting). Instead of parsing line by line each chunk of up to 'chunk_size' lines is split
+    on delimiters and newlines in one go and the columns are sliced straight out of the resulting list.
+    Uncompressed files are memory mapped and, when filtering (see RawTxnFilter), rows that don't pass are
+    dropped by looking at the raw bytes before anything is decoded. Yields lists of columns. Filtering happens
+    after the chunk is read so chunks can be smaller than 'chunk_size'.
+    """
+    txn_filter = RawTxnFilter.build(chain_info, token)
+
+    if csv_path.endswith(GZIP_EXTENSION):
+        chunks = _text_line_chunks(csv_path, chunk_size, byte_range)
+    else:
+        chunks = mmapped_line_chunks(csv_path, chunk_size, byte_range)
+
+    for chunk in chunks:
+        columns = _chunk_to_columns(chunk, txn_filter, csv_path)
+
+        if len(columns[0]) > 0:
+            yield columns
+
+
+def _text_line_chunks(csv_path: str, chunk_size: int, byte_range: Optional[ByteRange]) -> Iterator[str]:
+    """Yield strings containing up to 'chunk_size' lines of a (gzip) text file."""
+    with open_text_lines(csv_path, byte_range) as lines:
+        while True:
+            chunk = ''.join(islice(lines, chunk_size))
+
+            if len(chunk) == 0:
+                break
+
+            yield chunk
+
+
+def _chunk_to_columns(chunk: AnyStr, txn_filter: RawTxnFilter, csv_path: str) -> List[List[str]]:
+    """Split a str or bytes chunk of source CSV lines into (decoded) columns, keeping only rows that pass 'txn_filter'."""
+    if isinstance(chunk, bytes) and txn_filter.is_empty():
+        chunk = chunk.decode()  # Every row is kept so decode the chunk in one go
+
+    is_bytes = isinstance(chunk, bytes)
+    newline, delimiter = (b'\n', b'|') if is_bytes else ('\n', '|')
+    num_cols = len(RAW_TXN_DATA_CSV_COLS)
+
+    if not chunk.endswith(newline):
+        chunk += newline
+
+    chunk = chunk.replace(b'\r\n' if is_bytes else '\r\n', newline)
+    fields = chunk.replace(newline, delimiter).split(delimiter)
+    fields.pop()  # Empty string after the final newline
+
+    if len(fields) != chunk.count(newline) * num_cols:
+        raise ValueError(f"'{csv_path}' is not in the {num_cols} column pipe delimited format (use the csv reader)")
+
+    columns = [fields[i::num_cols] for i in range(num_cols)]
+
+    if not txn_filter.is_empty():
+        keep_mask = (txn_filter.encoded() if is_bytes else txn_filter).keep_mask(columns)
+        columns = [list(compress(column, keep_mask)) for column in columns]
+
+        # Only the rows that were kept get decoded, with one decode() per column
+        if is_bytes:
+            columns = [b'\n'.join(column).decode().split('\n') if column else [] for column in columns]
+
+    return columns
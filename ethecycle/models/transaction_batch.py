@@ -0,0 +1,124 @@
+"""
+Column oriented alternative to a list of Txn objects. Each field of a chunk of source CSV rows is
+held in its own tuple or array rather than in a Txn dataclass per row, and the derived fields
+(symbol, decimals, transaction_id) are computed once per batch instead of once per row.
+"""
+from array import array
+from itertools import repeat
+from operator import truediv
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Type
+
+from ethecycle.blockchains.chain_info import ChainInfo
+from ethecycle.config import Config
+from ethecycle.models.token import Token, TokenFilter
+from ethecycle.models.transaction import (NEO4J_TXN_CSV_COLUMN_NAMES, TXNS_PER_CHUNK,
+     read_raw_txn_columns, read_raw_txn_rows)
+from ethecycle.util.filesystem_helper import ByteRange
+from ethecycle.util.string_constants import *
+
+# Columns that hold the same value for every txn in the batch
+BATCH_WIDE_COLUMNS = [BLOCKCHAIN, EXTRACTED_AT]
+
+
+class TxnBatch:
+    def __init__(self, columns: Sequence[Sequence[str]], chain_info: Type[ChainInfo], extracted_at: str) -> None:
+        """Build from the (non-empty) columns of raw source CSV data in RAW_TXN_DATA_CSV_COLS order."""
+        if len(columns) == 0 or len(columns[0]) == 0:
+            raise ValueError("Can't build a TxnBatch with no rows")
+
+        self.chain_info = chain_info
+        self.blockchain = chain_info.chain_string()
+        self.extracted_at = extracted_at
+
+        (
+            self.token_address,
+            self.from_address,
+            self.to_address,
+            csv_value,
+            self.transaction_hash,
+            self.log_index,
+            block_number
+        ) = columns
+
+        # Some txns have multiple internal transfers so append log_index to achieve a unique ID.
+        self.transaction_id = list(map('{}-{}'.format, self.transaction_hash, self.log_index))
+        self.block_number = array('q', map(int, block_number))
+        self.num_tokens = array('d', map(float, csv_value))
+
+        # Token lookups are done once per distinct token address in the batch, not once per row.
+        tokens = {address: Token.symbol_and_decimals(self.blockchain, address) for address in set(self.token_address)}
+        self.symbol = [tokens[address][0] for address in self.token_address]
+
+        if not Config.skip_decimal_division:
+            divisors = {address: 10 ** decimals for address, (_symbol, decimals) in tokens.items()}
+            self.num_tokens = array('d', map(truediv, self.num_tokens, map(divisors.__getitem__, self.token_address)))
+
+    @classmethod
+    def extract_from_csv(
+            cls,
+            csv_path: str,
+            chain_info: Type[ChainInfo],
+            extracted_at: str,
+            token: TokenFilter,
+            chunk_size: int = TXNS_PER_CHUNK,
+            byte_range: Optional[ByteRange] = None
+        ) -> Iterator['TxnBatch']:
+        """Stream txions from a headerless CSV (or a byte range of one) as TxnBatches of at most 'chunk_size' rows."""
+        for columns in read_txn_columns(csv_path, chain_info, token, chunk_size, byte_range):
+            yield cls(columns, chain_info, extracted_at)
+
+    @classmethod
+    def from_rows(cls, rows: List[List[str]], chain_info: Type[ChainInfo], extracted_at: str) -> 'TxnBatch':
+        """Alternate constructor that transposes a list of raw source CSV rows into columns."""
+        return cls(list(zip(*rows)), chain_info, extracted_at)
+
+    def addresses(self) -> Set[str]:
+        """All the distinct non-empty to/from addresses in the batch."""
+        addresses = set(self.from_address).union(self.to_address)
+        addresses.discard('')
+        return addresses
+
+    def to_neo4j_csv_rows(self) -> Iterator[List[Optional[Any]]]:
+        """Generate Neo4J bulk load CSV rows (same output as Txn.to_neo4j_csv_row())."""
+        defaults = [MISSING_ADDRESS if col.endswith(ADDRESS) else None for col in NEO4J_TXN_CSV_COLUMN_NAMES]
+
+        columns = [
+            repeat(getattr(self, col)) if col in BATCH_WIDE_COLUMNS else getattr(self, col)
+            for col in NEO4J_TXN_CSV_COLUMN_NAMES
+        ]
+
+        for row in zip(*columns):
+            yield [value or default for value, default in zip(row, defaults)]
+
+    def to_dicts(self, include_scanner_url: bool = False) -> Iterator[Dict[str, Any]]:
+        """Yield each txn as a dict of properties, optionally including the (slow to build) scanner_url."""
+        columns = NEO4J_TXN_CSV_COLUMN_NAMES + [TRANSACTION_HASH]
+
+        for i in range(len(self)):
+            properties = {
+                col: getattr(self, col) if col in BATCH_WIDE_COLUMNS else getattr(self, col)[i]
+                for col in columns
+            }
+
+            if include_scanner_url:
+                properties[SCANNER_URL] = self.chain_info.scanner_url(properties[TRANSACTION_HASH])
+
+            yield properties
+
+    def __len__(self) -> int:
+        return len(self.transaction_id)
+
+
+def read_txn_columns(
+        csv_path: str,
+        chain_info: Type[ChainInfo],
+        token: TokenFilter,
+        chunk_size: int = TXNS_PER_CHUNK,
+        byte_range: Optional[ByteRange] = None
+    ) -> Iterator[Sequence[Sequence[str]]]:
+    """Read chunks of source CSV data as columns, with the fast parser if Config.fast_csv_parser is set."""
+    if Config.fast_csv_parser:
+        yield from read_raw_txn_columns(csv_path, chain_info, token, chunk_size, byte_range)
+    else:
+        for rows in read_raw_txn_rows(csv_path, chain_info, token, chunk_size, byte_range):
+            yield list(zip(*rows))
@@ -5,12 +5,12 @@ TODO: maybe compute the date or block_number of first txion? Maybe better done i
 from dataclasses import dataclass
 from functools import partial
 from random import randint
-from typing import Any, Dict, List, Optional, Type, Union
+from typing import Any, Dict, Iterator, List, Optional, Set, Type, Union
 
 from rich.text import Text
 
 #from ethecycle.blockchains.chain_info import ChainInfo # Circular import :(
-from ethecycle.models.address import Address
+from ethecycle.models.address import Address, normalize_address
 from ethecycle.models.token import Token
 #from ethecycle.models.transaction import Txn
 from ethecycle.util.string_constants import *
@@ -51,11 +51,11 @@ WALLET_LABEL_COLORS = {
 UNKNOWN = Text('UNKNOWN', style='color(234)')
 
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, slots=True)
 class Wallet(Address):
     def __post_init__(self):
         """Validate address"""
-        super().__post_init__()
+        super(Wallet, self).__post_init__()  # Zero arg super() doesn't work in slots dataclasses
 
         if self.address is None:
             raise ValueError(f"Address is required for wallets: {self}")
@@ -79,21 +79,40 @@ class Wallet(Address):
         Assumes all txns are from same blockchain.
         """
         addresses = set([t.to_address for t in txns]).union(set([t.from_address for t in txns]))
+        return cls.extract_wallets_from_addresses(addresses, txns[0].blockchain, txns[0].extracted_at)
 
-        try:
-            addresses.remove('')
-        except KeyError:
-            pass
-
-        addresses.add(MISSING_ADDRESS)
-        TokenWallet = partial(cls, blockchain=txns[0].blockchain, extracted_at=txns[0].extracted_at)
+    @classmethod
+    def extract_wallets_from_addresses(cls, addresses: Set[str], blockchain: str, extracted_at: str) -> List['Wallet']:
+        """Construct labeled Wallet objects for a set of addresses on 'blockchain' (plus MISSING_ADDRESS)."""
+        addresses = addresses.union([MISSING_ADDRESS])
+        addresses.discard('')
+        TokenWallet = partial(cls, blockchain=blockchain, extracted_at=extracted_at)
         return [TokenWallet(address=a).load_name_and_category() for a in addresses]
 
+    @classmethod
+    def neo4j_csv_rows_for_addresses(cls, addresses: Set[str], blockchain: str, extracted_at: str) -> Iterator[List[Optional[str]]]:
+        """
+        Same rows as to_neo4j_csv_row() on wallets built for 'addresses' but without building a Wallet for
+        every address. Most addresses have no label so one dict probe decides whether there's anything to
+        look up and unlabeled rows are emitted directly. Unlike extract_wallets_from_addresses() the caller
+        is responsible for adding MISSING_ADDRESS and removing empty strings.
+        """
+        cls.chain_addresses()  # Ensures data is loaded from DB
+        labeled_wallets = cls._by_blockchain_address[blockchain]
+
+        for address in addresses:
+            wallet = labeled_wallets.get(normalize_address(blockchain, address))
+
+            if wallet is None:
+                yield [address, blockchain, None, None, extracted_at]
+            else:
+                yield [address, blockchain, wallet.name, wallet.category, extracted_at]
+
     @classmethod
     def _after_load_callback(cls) -> None:
         """Add the token addresses because tokens are wallets too."""
         for token in Token.all():
-            cls._by_blockchain_address[token.blockchain][token.address] = cls.from_token(token)
+            cls._by_blockchain_address[token.blockchain][normalize_address(token.blockchain, token.address)] = cls.from_token(token)
 
     def load_name_and_category(self) -> 'Wallet':
         """Loads label and category fields from chain_addresses.db. Returns self."""
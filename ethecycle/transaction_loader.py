@@ -2,38 +2,57 @@
 Load transactions from CSV as python lists and/or directly into the graph database.
 """
 import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
 from os import path, remove
-from typing import List, Optional
+from typing import Iterator, List, Optional, Sequence, Type
 
 from rich.text import Text
 
+from ethecycle.blockchains.chain_info import ChainInfo
 from ethecycle.config import Config
 from ethecycle.export.neo4j_csv import HEADER, Neo4jCsvs
+from ethecycle.export.wallet_registry import DiskWalletRegistry, WalletRegistry
 from ethecycle.models.blockchain import get_chain_info
-from ethecycle.models.transaction import Txn
-from ethecycle.util.filesystem_helper import OUTPUT_DIR
+from ethecycle.models.token import Token, TokenFilter, TokenLookupTable
+from ethecycle.models.transaction_batch import TxnBatch, read_txn_columns
+from ethecycle.models.wallet import Wallet
+from ethecycle.util.filesystem_helper import OUTPUT_DIR, ByteRange, is_seekable, newline_aligned_byte_ranges
 from ethecycle.util.logging import console, log, print_benchmark
 from ethecycle.util.neo4j_helper import admin_load_bash_command, import_to_neo4j
+from ethecycle.util.number_helper import MEGABYTE
+from ethecycle.util.pipeline_helper import threaded_stage
 from ethecycle.util.string_constants import *
 from ethecycle.util.time_helper import current_timestamp_iso8601_str
 
+# Source CSVs bigger than this are split into newline aligned byte ranges when loading with multiple workers.
+# (For gzip files the file size is compressed but the byte ranges are in the uncompressed data.)
+SPLIT_BIG_FILES_THRESHOLD = 100 * MEGABYTE
 
-def load_into_neo4j(txn_csvs: List[str], blockchain: str, token: Optional[str] = None) -> None:
+
+def load_into_neo4j(txn_csvs: List[str], blockchain: str, token: TokenFilter = None) -> None:
     """
-    ETL that loads chain txion CSVs into Neo4j, optionally filtered for 'token' arg.
+    ETL that loads chain txion CSVs into Neo4j, optionally filtered for 'token' arg (symbol(s) and/or address(es)).
     CSVs will be deleted after successful load unless the 'preserve_csvs' arg is set to True.
+    With one worker reading, transforming and writing run as a pipeline of threaded stages (which only
+    overlaps the I/O). If Config.workers > 1 the pipeline isn't used; the source CSVs are extracted and
+    transformed in parallel processes instead, with big CSVs split up into byte ranges that are processed
+    by separate workers.
+    Each wallet address is written to the wallet CSVs only once per load.
     """
     extracted_at = current_timestamp_iso8601_str()
     start_time = time.perf_counter()
     chain_info = get_chain_info(blockchain)
     neo4j_csvs = [Neo4jCsvs(HEADER)]
+    wallet_registry = _build_wallet_registry()
 
-    for txn_csv in txn_csvs:
-        start_file_time = time.perf_counter()
-        txns = Txn.extract_from_csv(txn_csv, chain_info, extracted_at, token)
-        duration = print_benchmark(f"Extracted {len(txns)} from source CSV", start_file_time)
-        neo4j_csvs.append(Neo4jCsvs(txns))
-        print_benchmark(f"Generated CSVs for '{path.basename(txn_csv)}'", start_file_time + duration)
+    try:
+        if Config.workers > 1:
+            neo4j_csvs.extend(_extract_in_worker_processes(txn_csvs, chain_info, extracted_at, token, wallet_registry))
+        else:
+            neo4j_csvs.extend(_extract_and_transform_pipelined(txn_csvs, chain_info, extracted_at, token, wallet_registry))
+    finally:
+        wallet_registry.close()
 
     # Create neo4j-admin shell command that will bulk load all the Neo4j CSVs we just extracted/transformed.
     bulk_load_shell_command = admin_load_bash_command(neo4j_csvs)
@@ -53,6 +72,147 @@ def load_into_neo4j(txn_csvs: List[str], blockchain: str, token: Optional[str] =
     _clean_up(neo4j_csvs)
 
 
+def _extract_and_transform(
+        txn_csv: str,
+        chain_info: Type[ChainInfo],
+        extracted_at: str,
+        token: TokenFilter,
+        wallet_registry: Optional[WalletRegistry] = None,
+        byte_range: Optional[ByteRange] = None
+    ) -> List[Neo4jCsvs]:
+    """Extract txns from one source CSV (or a byte range of one) and write Neo4j CSVs, one set per chunk."""
+    start_file_time = time.perf_counter()
+    source_description = f"'{path.basename(txn_csv)}'"
+    neo4j_csvs = []
+    txn_count = 0
+
+    if byte_range is not None:
+        source_description += f" (bytes {byte_range[0]}-{byte_range[1]})"
+
+    # Stream the source CSV in chunks so memory use doesn't grow with file size
+    for txns in TxnBatch.extract_from_csv(txn_csv, chain_info, extracted_at, token, byte_range=byte_range):
+        start_chunk_time = time.perf_counter()
+        txn_count += len(txns)
+        neo4j_csvs.append(Neo4jCsvs(txns, wallet_registry))
+        print_benchmark(f"Generated CSVs for {len(txns)} txns", start_chunk_time)
+
+    print_benchmark(f"Extracted {txn_count} txns from {source_description}", start_file_time)
+    return neo4j_csvs
+
+
+def _extract_and_transform_pipelined(
+        txn_csvs: List[str],
+        chain_info: Type[ChainInfo],
+        extracted_at: str,
+        token: TokenFilter,
+        wallet_registry: WalletRegistry
+    ) -> List[Neo4jCsvs]:
+    """
+    Same output as calling _extract_and_transform() on each of 'txn_csvs' but the read, transform and write
+    stages each run in their own thread (connected by bounded queues). Only disk I/O and gunzip overlap with
+    the other stages; CSV parsing and TxnBatch construction hold the GIL so the transform stage is effectively
+    single threaded. Only used when Config.workers is 1; with more workers _extract_in_worker_processes()
+    is used instead and this pipeline is bypassed entirely.
+    """
+    # Load chain address data here so the stages' threads never have to go to the DB for it
+    Wallet.chain_addresses()
+    Token.lookup_table(chain_info.chain_string())
+    raw_chunks = threaded_stage(_read_txn_csvs(txn_csvs, chain_info, token), 'Read', count_rows=_column_length)
+    txn_batches = threaded_stage((TxnBatch(columns, chain_info, extracted_at) for columns in raw_chunks), 'Transform')
+    start_time = time.perf_counter()
+    neo4j_csvs = []
+    txn_count = 0
+
+    for txns in txn_batches:
+        txn_count += len(txns)
+        neo4j_csvs.append(Neo4jCsvs(txns, wallet_registry))
+
+    rows_per_second = txn_count / max(time.perf_counter() - start_time, 1e-9)
+    print_benchmark(f"Write stage: {len(neo4j_csvs)} chunks, {txn_count} rows ({rows_per_second:,.0f} rows/sec)", start_time)
+    return neo4j_csvs
+
+
+def _read_txn_csvs(
+        txn_csvs: List[str],
+        chain_info: Type[ChainInfo],
+        token: TokenFilter
+    ) -> Iterator[Sequence[Sequence[str]]]:
+    """Read stage of the pipeline: chunks of raw columns from each of 'txn_csvs' in turn."""
+    for txn_csv in txn_csvs:
+        start_file_time = time.perf_counter()
+        txn_count = 0
+
+        for columns in read_txn_columns(txn_csv, chain_info, token):
+            txn_count += _column_length(columns)
+            yield columns
+
+        print_benchmark(f"Read {txn_count} txns from '{path.basename(txn_csv)}'", start_file_time)
+
+
+def _column_length(columns: Sequence[Sequence[str]]) -> int:
+    return len(columns[0])
+
+
+def _extract_in_worker_processes(
+        txn_csvs: List[str],
+        chain_info: Type[ChainInfo],
+        extracted_at: str,
+        token: TokenFilter,
+        wallet_registry: Optional[DiskWalletRegistry] = None
+    ) -> List[Neo4jCsvs]:
+    """
+    Fan _extract_and_transform() for each of 'txn_csvs' (or pieces of them) out across Config.workers processes.
+    'wallet_registry' must be disk backed because it is shared by the workers.
+    """
+    source_pieces = [(txn_csv, byte_range) for txn_csv in txn_csvs for byte_range in _split_big_file(txn_csv)]
+    msg = f"Extracting {len(source_pieces)} pieces of {len(txn_csvs)} CSVs with {Config.workers} worker processes..."
+    console.print(msg, style='bright_cyan')
+    # Load chain address data once here instead of once per worker. Workers are forked so they
+    # inherit the wallet labels; the chain's token lookup table is handed to them explicitly.
+    Wallet.chain_addresses()
+    token_lookup_table = Token.lookup_table(chain_info.chain_string())
+
+    with ProcessPoolExecutor(
+            max_workers=Config.workers,
+            mp_context=get_context('fork'),
+            initializer=_init_worker,
+            initargs=(chain_info.chain_string(), token_lookup_table)
+        ) as pool:
+        futures = [
+            pool.submit(_extract_and_transform, txn_csv, chain_info, extracted_at, token, wallet_registry, byte_range)
+            for txn_csv, byte_range in source_pieces
+        ]
+
+        # Results are collected in submission order so the bulk load command is deterministic
+        return [csvs for future in futures for csvs in future.result()]
+
+
+def _split_big_file(txn_csv: str) -> List[Optional[ByteRange]]:
+    """Returns newline aligned byte ranges for big files, [None] (meaning 'whole file') for small ones."""
+    if path.getsize(txn_csv) <= SPLIT_BIG_FILES_THRESHOLD:
+        return [None]
+    elif not is_seekable(txn_csv):
+        log.warning(f"'{txn_csv}' is big but can't be split up without indexed_gzip; processing it in one piece.")
+        return [None]
+
+    byte_ranges = newline_aligned_byte_ranges(txn_csv, SPLIT_BIG_FILES_THRESHOLD)
+    console.print(f"Split '{txn_csv}' into {len(byte_ranges)} byte ranges for parallel extraction.", style='dim')
+    return byte_ranges
+
+
+def _build_wallet_registry() -> WalletRegistry:
+    """Worker processes can only share a disk backed registry."""
+    if Config.disk_wallet_registry or Config.workers > 1:
+        return DiskWalletRegistry()
+    else:
+        return WalletRegistry()
+
+
+def _init_worker(blockchain: str, token_lookup_table: TokenLookupTable) -> None:
+    """Install the pre-built token lookup table in a worker process."""
+    Token.set_lookup_table(blockchain, token_lookup_table)
+
+
 def _clean_up(neo4j_csvs: List[Neo4jCsvs]) -> None:
     """Remove CSVs that were successfully loaded and other maintenance"""
     console.line()
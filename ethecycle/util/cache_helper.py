@@ -0,0 +1,48 @@
+"""
+Bounded memoization for hot lookups.
+"""
+from typing import Any, Callable, Dict, Hashable
+
+from ethecycle.util.number_helper import pct_str
+
+DEFAULT_MAX_CACHE_SIZE = 2 ** 16
+
+
+class LookupCache:
+    """
+    Memo of lookup results that also remembers misses (None results) and counts hits / misses. It's
+    emptied when it fills up; keeping LRU order costs about as much as the dict probes it saves.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_MAX_CACHE_SIZE) -> None:
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._cache: Dict[Hashable, Any] = {}
+
+    def get_or_compute(self, key: Hashable, compute: Callable[..., Any], *args: Any) -> Any:
+        """Return cached value for 'key' if there is one, otherwise call compute(*args) and cache the result."""
+        try:
+            value = self._cache[key]
+        except KeyError:
+            self.misses += 1
+
+            if len(self._cache) >= self.max_size:
+                self._cache.clear()
+
+            value = self._cache[key] = compute(*args)
+            return value
+
+        self.hits += 1
+        return value
+
+    def clear(self) -> None:
+        self._cache.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def __str__(self) -> str:
+        return f"{self.hits} hits, {self.misses} misses ({pct_str(self.hits, self.hits + self.misses)} hit rate)"
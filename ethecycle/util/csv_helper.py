@@ -2,17 +2,28 @@
 Helpers for CSV files.
 """
 import csv
-from typing import Any, List
+import gzip
+from typing import Any, Iterable, Optional
 
 from rich.text import Text
 
-from ethecycle.util.filesystem_helper import file_size_string
+from ethecycle.util.filesystem_helper import GZIP_EXTENSION, file_size_string
 from ethecycle.util.logging import console
+# Speed matters more than size for intermediate files that are deleted after the load
+GZIP_CSV_DEFAULT_LEVEL = 1
 
 
-def write_list_of_lists_to_csv(csv_path: str, objs: List[Any]) -> None:
-    """Write objs to csv_path"""
-    with open(csv_path, 'w') as csvfile:
+def write_list_of_lists_to_csv(csv_path: str, objs: Iterable[Any], compression_level: Optional[int] = None) -> None:
+    """
+    Write objs to csv_path. If csv_path ends with '.gz' the CSV is gzipped as it's written
+    at 'compression_level' (GZIP_CSV_DEFAULT_LEVEL if not provided).
+    """
+    if csv_path.endswith(GZIP_EXTENSION):
+        csvfile_context = gzip.open(csv_path, 'wt', compresslevel=compression_level or GZIP_CSV_DEFAULT_LEVEL)
+    else:
+        csvfile_context = open(csv_path, 'w')
+
+    with csvfile_context as csvfile:
         csv_writer = csv.writer(csvfile)
 
         for obj in objs:
@@ -4,19 +4,30 @@ importlib explanation: https://fossies.org/linux/Python/Lib/importlib/resources.
 """
 import gzip
 import importlib.resources
+import io
+import mmap
 import os
 import re
 import shutil
+from contextlib import contextmanager
 from datetime import datetime
 from os import path
 from pathlib import Path, PosixPath
-from subprocess import check_call
-from typing import List, Optional, Union
+from subprocess import PIPE, CalledProcessError, Popen
+from typing import IO, Iterable, Iterator, List, Optional, Tuple, Union
 
 from ethecycle.config import Config
-from ethecycle.util.logging import console
+from ethecycle.util.logging import console, log
 from ethecycle.util.number_helper import size_string
 
+# Optional: allows seeking in (and therefore splitting up) big gzipped files
+try:
+    import indexed_gzip
+except ImportError:
+    indexed_gzip = None
+
+ByteRange = Tuple[int, int]
+
 # Dirs inside package structure
 PACKAGE_DIR = importlib.resources.files('ethecycle')
 CHAIN_ADDRESSES_DIR = PACKAGE_DIR.joinpath('chain_addresses')
@@ -31,12 +42,16 @@ if Config.is_test_env:
 else:
     OUTPUT_DIR = PROJECT_ROOT_DIR.joinpath('output')
 
-# If files are really big we automatically split them up for loading
-SPLIT_FILES_DIR = OUTPUT_DIR.joinpath('tmp')
-DEFAULT_LINES_PER_FILE = 250000
+# Seek point indexes for big gzip files that are read in byte ranges
+GZIP_INDEX_DIR = OUTPUT_DIR.joinpath('gzip_indexes')
+GZIP_INDEX_EXTENSION = '.gzidx'
 ETHECYCLE_DIR = '/ethecycle'
 GZIP_EXTENSION = '.gz'
 
+# Tried in order when decompressing in a separate process
+GUNZIP_COMMANDS = ['pigz', 'gzip']
+GUNZIP_PIPE_BUFFER_SIZE = 1024 * 1024
+
 # Token info repo is checked out as part of Dockerfile build process
 # TODO: rename to CHAIN_ADDRESS_REPOS_DIR
 CHAIN_ADDRESS_DATA_DIR = os.environ['CHAIN_ADDRESS_DATA_DIR']
@@ -63,6 +78,157 @@ def load_file_contents(file_path: Union[Path, str]) -> str:
         return file.read()
 
 
+def open_text_file(file_path: str) -> IO[str]:
+    """Open a text or gzip file for reading as text (newline translation is left to the caller, e.g. csv.reader)."""
+    if file_path.endswith(GZIP_EXTENSION):
+        return gzip.open(file_path, 'rt', newline='')
+    else:
+        return open(file_path, newline='')
+
+
+def open_binary_file(file_path: str) -> IO[bytes]:
+    """
+    Open a file for random access reads. Gzip files are opened with indexed_gzip so offsets are positions
+    in the uncompressed data; the seek point index is loaded from disk if it exists or built and saved if not.
+    """
+    if not file_path.endswith(GZIP_EXTENSION):
+        return open(file_path, 'rb')
+    elif indexed_gzip is None:
+        raise ValueError(f"Can't seek in '{file_path}' without the indexed_gzip package")
+
+    index_path = gzip_index_path(file_path)
+
+    if path.isfile(index_path):
+        return indexed_gzip.IndexedGzipFile(file_path, index_file=index_path)
+
+    console.print(f"Building gzip index for '{file_path}' (requires decompressing the whole file)...", style='dim')
+    gzip_file = indexed_gzip.IndexedGzipFile(file_path)
+    gzip_file.build_full_index()
+    os.makedirs(GZIP_INDEX_DIR, exist_ok=True)
+    gzip_file.export_index(index_path)
+    return gzip_file
+
+
+def gzip_index_path(file_path: str) -> str:
+    """Use an index next to the gzip file if there is one, otherwise one in GZIP_INDEX_DIR."""
+    index_path = file_path + GZIP_INDEX_EXTENSION
+
+    if path.isfile(index_path):
+        return index_path
+
+    # File size is part of the name so a same named file from another dir doesn't pick up the wrong index
+    return str(GZIP_INDEX_DIR.joinpath(f"{path.basename(file_path)}.{path.getsize(file_path)}{GZIP_INDEX_EXTENSION}"))
+
+
+def is_seekable(file_path: str) -> bool:
+    """Uncompressed files can always be read in byte ranges, gzip files only if indexed_gzip is installed."""
+    return not file_path.endswith(GZIP_EXTENSION) or indexed_gzip is not None
+
+
+def newline_aligned_byte_ranges(file_path: str, max_range_size: int) -> List[ByteRange]:
+    """
+    Carve a file into contiguous (start, end) byte ranges of about 'max_range_size' bytes, each of which
+    ends on a newline. Nothing is copied; readers seek straight to their range with open_text_lines().
+    """
+    byte_ranges = []
+    start = 0
+
+    with open_binary_file(file_path) as file:
+        file_size = file.seek(0, os.SEEK_END)
+
+        while start < file_size:
+            end = start + max_range_size
+
+            if end >= file_size:
+                end = file_size
+            else:
+                file.seek(end)
+                file.readline()  # Move forward to the end of the line
+                end = file.tell()
+
+            byte_ranges.append((start, end))
+            start = end
+
+    return byte_ranges
+
+
+@contextmanager
+def open_text_lines(file_path: str, byte_range: Optional[ByteRange] = None) -> Iterator[Iterable[str]]:
+    """
+    Yield an iterable over the lines of a text or gzip file, optionally only those in 'byte_range'.
+    Whole gzip files are decompressed in a separate process if Config.background_decompression is set.
+    """
+    if byte_range is None:
+        if file_path.endswith(GZIP_EXTENSION) and Config.background_decompression:
+            with gunzip_in_subprocess(file_path) as file:
+                yield file
+        else:
+            with open_text_file(file_path) as file:
+                yield file
+    else:
+        with open_binary_file(file_path) as file:
+            yield _lines_in_byte_range(file, *byte_range)
+
+
+@contextmanager
+def gunzip_in_subprocess(file_path: str) -> Iterator[IO[str]]:
+    """
+    Decompress a gzip file with pigz (or gzip if pigz isn't installed) in a child process and yield a text
+    stream of its output. Decompression then runs on another core in parallel with whatever consumes the lines.
+    Falls back to in-process decompression if neither is available.
+    """
+    gunzip = next((command for command in GUNZIP_COMMANDS if shutil.which(command)), None)
+
+    if gunzip is None:
+        log.warning(f"None of {GUNZIP_COMMANDS} found; decompressing '{file_path}' in process.")
+
+        with open_text_file(file_path) as file:
+            yield file
+
+        return
+
+    process = Popen([gunzip, '--decompress', '--stdout', file_path], stdout=PIPE, bufsize=GUNZIP_PIPE_BUFFER_SIZE)
+
+    try:
+        yield io.TextIOWrapper(process.stdout, encoding='utf-8', newline='')
+    finally:
+        process.stdout.close()
+        return_code = process.wait()
+
+    if return_code != 0:
+        raise CalledProcessError(return_code, process.args)
+
+
+def mmapped_line_chunks(
+        file_path: str,
+        lines_per_chunk: int,
+        byte_range: Optional[ByteRange] = None
+    ) -> Iterator[bytes]:
+    """
+    Memory map an uncompressed file and yield undecoded chunks of up to 'lines_per_chunk' lines,
+    optionally only from 'byte_range'. Chunk boundaries are found by scanning the map for newlines
+    so nothing is read or decoded line by line.
+    """
+    if path.getsize(file_path) == 0:
+        return
+
+    with open(file_path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+        start, end = byte_range or (0, len(mapped_file))
+
+        while start < end:
+            position = start
+
+            for _i in range(lines_per_chunk):
+                position = mapped_file.find(b'\n', position, end) + 1
+
+                if position == 0 or position >= end:
+                    position = end  # No more newlines (or we hit the end of the range)
+                    break
+
+            yield mapped_file[start:position]
+            start = position
+
+
 def get_lines(file_path: str, comment_char: Optional[str] = '#') -> List[str]:
     """Get lines from text or gzip file optionally skipping lines starting with comment_char."""
     if file_path.endswith(GZIP_EXTENSION):
@@ -97,38 +263,19 @@ def timestamp_for_filename() -> str:
     return datetime.now().strftime("%Y-%m-%dT%H.%M.%S")
 
 
-def split_big_file(file_path: str, lines_per_file: int = DEFAULT_LINES_PER_FILE) -> List[str]:
-    """Copies the file to a tmp dir, splits it up, and returns list of files that resulted from the split."""
-    file_basename = path.basename(file_path)
-    file_basename_no_ext = Path(file_path).stem
-    split_files_dir = SPLIT_FILES_DIR.joinpath(f"split_{file_basename_no_ext}")
-    copied_file_path = split_files_dir.joinpath(file_basename)
-    split_cmd = f"split -d -l {lines_per_file} {file_basename} {file_basename}."
-
-    if not path.isdir(SPLIT_FILES_DIR):
-        console.print(f"Creating tmp dir for split files: '{SPLIT_FILES_DIR}'...", style='dim')
-        os.mkdir(SPLIT_FILES_DIR)
-
-    if not path.isdir(split_files_dir):
-        console.print(f"Creating dir for results of splitting big file: '{split_files_dir}'", style='dim')
-        os.mkdir(split_files_dir)
-
-    console.print(f"Copying '{file_path}' to '{copied_file_path}'...", style='dim')
-    shutil.copy(file_path, copied_file_path)
-
-    # Do the split
-    current_working_dir = os.getcwd()
-    os.chdir(split_files_dir)
-    console.print(f"Running: '{split_cmd}' in '{split_files_dir}'...", style='dim')
-    check_call(split_cmd.split(' '))
-    console.print(f"Splitting file complete; removing '{copied_file_path}'...", style='dim')
-    os.chdir(current_working_dir)
-    os.remove(copied_file_path)
-
-    # Collect files
-    files = files_in_dir(str(split_files_dir))
-    console.print(f"{len(files)} files resulted from the split.")
-    return files
+def _lines_in_byte_range(file: IO[bytes], start: int, end: int) -> Iterator[str]:
+    """Seek to 'start' and decode lines until 'end' is reached."""
+    file.seek(start)
+    position = start
+
+    while position < end:
+        line = file.readline()
+
+        if len(line) == 0:
+            break
+
+        position += len(line)
+        yield line.decode()
 
 
 def _non_hidden_files_in_dir(dir: os.PathLike) -> List[str]:
@@ -0,0 +1,101 @@
+"""
+Run the stages of an ETL in separate threads connected by bounded queues so that reading, transforming
+and writing overlap. Only raw file reads / writes and gzip (de)compression release the GIL, so that's all
+that really runs concurrently; CSV parsing and other pure python work in different stages still takes
+turns on one core. Bounded queues provide backpressure: a fast stage blocks when it gets too far ahead
+of a slow one instead of piling up chunks in memory.
+"""
+import time
+from queue import Empty, Full, Queue
+from threading import Event, Thread
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+from ethecycle.util.logging import print_benchmark
+
+DEFAULT_QUEUE_SIZE = 2
+POLL_INTERVAL_SECONDS = 0.1
+_END_OF_STAGE = object()
+
+
+class _StageError:
+    """Carries an exception raised in a stage's thread over to the consuming thread."""
+    def __init__(self, exception: BaseException) -> None:
+        self.exception = exception
+
+
+def threaded_stage(
+        items: Iterable[Any],
+        stage_name: str,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        count_rows: Optional[Callable[[Any], int]] = len
+    ) -> Iterator[Any]:
+    """
+    Iterate over 'items' in a background thread, handing them to the caller through a queue of at most
+    'queue_size' items. Stages are chained by passing one stage's output as the next one's 'items'.
+    Exceptions in the background thread are re-raised in the caller. Prints the stage's throughput
+    (using 'count_rows' to count the rows in each item) and how long it was blocked by a slower
+    downstream stage when it's done.
+    """
+    queue: Queue = Queue(maxsize=queue_size)
+    stop = Event()
+
+    def put(item: Any) -> float:
+        """Put 'item' on the queue unless the consumer has gone away. Returns seconds spent blocked."""
+        start_time = time.perf_counter()
+
+        while not stop.is_set():
+            try:
+                queue.put(item, timeout=POLL_INTERVAL_SECONDS)
+                break
+            except Full:
+                continue
+
+        return time.perf_counter() - start_time
+
+    def run() -> None:
+        start_time = time.perf_counter()
+        blocked_seconds = 0.0
+        item_count = row_count = 0
+
+        try:
+            for item in items:
+                item_count += 1
+                row_count += count_rows(item) if count_rows else 0
+                blocked_seconds += put(item)
+
+                if stop.is_set():
+                    return
+        except BaseException as e:
+            put(_StageError(e))
+            return
+        finally:
+            if hasattr(items, 'close'):
+                items.close()  # Shut down upstream stages promptly if we stopped early
+
+        rows_per_second = row_count / max(time.perf_counter() - start_time, 1e-9)
+        msg = f"{stage_name} stage: {item_count} chunks, {row_count} rows ({rows_per_second:,.0f} rows/sec, "
+        print_benchmark(msg + f"{blocked_seconds:.2f}s waiting on next stage)", start_time)
+        put(_END_OF_STAGE)
+
+    thread = Thread(target=run, name=f"{stage_name}_stage", daemon=True)
+    thread.start()
+
+    try:
+        while True:
+            try:
+                item = queue.get(timeout=POLL_INTERVAL_SECONDS)
+            except Empty:
+                if not thread.is_alive() and queue.empty():
+                    raise RuntimeError(f"{stage_name} stage thread exited without finishing")
+
+                continue
+
+            if item is _END_OF_STAGE:
+                break
+            elif isinstance(item, _StageError):
+                raise item.exception
+
+            yield item
+    finally:
+        stop.set()  # Unblocks the stage's thread if the consumer stops early
+        thread.join()
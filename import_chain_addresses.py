@@ -2,16 +2,15 @@
 """
 Script to help reimport or update various chain address data sources.
 """
-import importlib
 from argparse import ArgumentParser
 from os import environ, path
 from sys import exit
 
 from rich_argparse_plus import RichHelpFormatterPlus
 
-from ethecycle.chain_addresses.address_db import drop_and_recreate_tables
+from ethecycle.chain_addresses.address_db import drop_and_recreate_tables, refresh_coalesced_tables
 from ethecycle.chain_addresses.db import CHAIN_ADDRESSES_DB_FILE_NAME, CHAIN_ADDRESSES_DB_PATH
-from ethecycle.chain_addresses.importers import rebuild_chain_addresses_db
+from ethecycle.chain_addresses.importers import IMPORTERS, get_importer, rebuild_chain_addresses_db
 from ethecycle.config import Config
 from ethecycle.util.filesystem_helper import SCRIPTS_DIR
 from ethecycle.util.logging import console, set_log_level
@@ -20,14 +19,11 @@ from ethecycle.util.string_constants import DEBUG
 REBUILD_ALL = 'ALL'
 RESET_DB = 'RESET_DB'
 IMPORT_PREFIX = 'import_'
-IMPORTER_MODULE_STR = 'ethecycle.chain_addresses.importers'
-IMPORTERS_MODULE = importlib.import_module(IMPORTER_MODULE_STR)
 PREBUILT_CHAIN_ADDRESS_DB_PATH = path.join(SCRIPTS_DIR, 'docker', 'container_files', CHAIN_ADDRESSES_DB_FILE_NAME)
 
 IMPORTER_METHODS = [REBUILD_ALL, RESET_DB] + [
     import_method.removeprefix(IMPORT_PREFIX)
-    for import_method in dir(IMPORTERS_MODULE)
-    if import_method.startswith(IMPORT_PREFIX)
+    for import_method in IMPORTERS.keys()
 ]
 
 
@@ -46,11 +42,17 @@ parser.add_argument('importer_method',
 parser.add_argument('-s', '--suppress-warnings', action='store_true',
                     help='suppress DB collision warnings')
 
+parser.add_argument('-w', '--workers', type=int, default=1,
+                    help=f"number of processes to run the importers with when rebuilding with '{REBUILD_ALL}'")
+
 parser.add_argument('-D', '--debug', action='store_true',
                     help='show debug level log output')
 
 args = parser.parse_args()
 
+if args.workers < 1:
+    raise ValueError(f"--workers must be at least 1 (got {args.workers})")
+
 if args.debug:
     Config.debug = True
     set_log_level(DEBUG)
@@ -68,8 +70,9 @@ if args.importer_method == REBUILD_ALL:
         else:
             console.print(f"Prebuilt DB requested but '{CHAIN_ADDRESSES_DB_PATH}' does not exist so proceeding w/build...")
 
-    rebuild_chain_addresses_db()
+    rebuild_chain_addresses_db(args.workers)
 elif args.importer_method == RESET_DB:
     drop_and_recreate_tables()
 else:
-    getattr(IMPORTERS_MODULE, IMPORT_PREFIX + args.importer_method)()
+    get_importer(IMPORT_PREFIX + args.importer_method)()
+    refresh_coalesced_tables()
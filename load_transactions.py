@@ -9,29 +9,17 @@ from rich.text import Text
 from rich_argparse_plus import RichHelpFormatterPlus
 
 from ethecycle.config import Config
-from ethecycle.models.blockchain import BLOCKCHAINS
-from ethecycle.models.token import Token
-from ethecycle.neo4j import Neo4j
-from ethecycle.transaction_loader import load_into_neo4j
-from ethecycle.util.filesystem_helper import files_in_dir
+from ethecycle.models.blockchain import BLOCKCHAINS, get_chain_info
+from ethecycle.util.csv_helper import GZIP_CSV_DEFAULT_LEVEL
+from ethecycle.util.filesystem_helper import files_in_dir, get_lines
 from ethecycle.util.logging import ask_for_confirmation, console, set_log_level
-from ethecycle.util.number_helper import MEGABYTE
 from ethecycle.util.string_constants import DEBUG, ETHEREUM
 
 INCREMENTAL_LOAD_WARNING = Text("\nYou selected incremental import which probably doesn't work.\n", style='red')
 INCREMENTAL_LOAD_WARNING.append('  Did you forget the --drop option?', style='bright_red')
-SPLIT_BIG_FILES_THRESHOLD = 100 * MEGABYTE
 LIST_TOKEN_SYMBOLS = '--list-token-symbols'
 DEFAULT_DEBUG_LINES = 5
 
-Token.chain_addresses()  # Force load from DB
-
-CONFIGURED_TOKENS = set([
-    symbol
-    for _blockchain, symbol_tokens in Token._by_blockchain_symbol.items()
-    for symbol in symbol_tokens.keys()
-])
-
 
 # Argument parser
 RichHelpFormatterPlus.choose_theme('prince')
@@ -49,8 +37,17 @@ parser.add_argument('-b', '--blockchain',
                     choices=BLOCKCHAINS.keys(),
                     default=ETHEREUM)
 
-parser.add_argument('-t', '--token',
-                    help='token symbol to filter transactions for (e.g. USDT, WETH)')
+parser.add_argument('-t', '--token', action='append',
+                    help='token symbol or address to filter transactions for (e.g. USDT, WETH). Can be repeated.')
+
+parser.add_argument('--min-block', type=int,
+                    help='only load transactions in this block or later')
+
+parser.add_argument('--max-block', type=int,
+                    help='only load transactions in this block or earlier')
+
+parser.add_argument('--address-file',
+                    help='only load transactions to or from the addresses in this file (one per line, # comments ok)')
 
 parser.add_argument('-d', '--drop', action='store_true',
                     help="drop and recreate the database")
@@ -61,6 +58,24 @@ parser.add_argument('-e', '--extract-only', action='store_true',
 parser.add_argument('-p', '--preserve-csvs', action='store_true',
                     help="remove (delete) extracted data CSVs once they have been loaded")
 
+parser.add_argument('-w', '--workers', type=int, default=1,
+                    help='number of processes to extract/transform source CSVs with (big CSVs are split up across them)')
+
+parser.add_argument('-f', '--fast-parser', action='store_true',
+                    help='parse source CSVs with the fast parser (requires exactly 7 pipe delimited columns with no quoting)')
+
+parser.add_argument('-g', '--background-gunzip', action='store_true',
+                    help='decompress gzipped source CSVs in a separate pigz (or gzip) process in parallel with parsing')
+
+parser.add_argument('-z', '--gzip-csvs', action='store_true',
+                    help="gzip the CSVs generated for neo4j-admin (trades CPU for disk space / disk I/O)")
+
+parser.add_argument('--compression-level', type=int, default=GZIP_CSV_DEFAULT_LEVEL,
+                    help='gzip compression level (1-9) for --gzip-csvs')
+
+parser.add_argument('--disk-wallet-registry', action='store_true',
+                    help="track already written wallets in a scratch sqlite DB instead of memory (for huge loads)")
+
 parser.add_argument('-D', '--debug', action='store_true',
                     help='show debug level log output')
 
@@ -68,16 +83,25 @@ parser.add_argument(LIST_TOKEN_SYMBOLS, action='store_true',
                     help='show all configured tokens selectable with --token and exit')
 
 
-# Parse args
+Config.read_only_chain_address_db = True  # Loading txns only ever reads chain address data
+
+# Parse args. The chain address DB and the heavy modules (neo4j, pandas, sqllex) are only loaded
+# once they are needed so that --help and --list-token-symbols return quickly.
 if LIST_TOKEN_SYMBOLS in sys.argv:
+    from ethecycle.models.token import Token
     console.print(Panel('Known Token Symbols'))
     console.line()
-    console.print(Columns(sorted(list(CONFIGURED_TOKENS))))
+    console.print(Columns(sorted(Token.configured_symbols())))
     console.line()
     sys.exit()
 
 args = parser.parse_args()
 
+from ethecycle.models.address import normalize_address
+from ethecycle.models.token import Token
+from ethecycle.neo4j import Neo4j
+from ethecycle.transaction_loader import load_into_neo4j
+
 if args.debug:
     Config.debug = True
     set_log_level(DEBUG)
@@ -90,12 +114,43 @@ else:
 if args.extract_only:
     Config.extract_only = True
 
-if args.token and args.token not in CONFIGURED_TOKENS:
-    raise ValueError(f"'{args.token}' is not a known symbol. Try --list-token-symbols to see options.")
+for token in (args.token or []):
+    if token not in Token.configured_symbols() and not get_chain_info(args.blockchain).is_valid_address(token):
+        raise ValueError(f"'{token}' is not a known symbol or address. Try --list-token-symbols to see options.")
 
 if args.preserve_csvs:
     Config.preserve_csvs = True
 
+if args.workers < 1:
+    raise ValueError(f"--workers must be at least 1 (got {args.workers})")
+
+Config.workers = args.workers
+
+if args.min_block is not None and args.max_block is not None and args.min_block > args.max_block:
+    raise ValueError(f"--min-block {args.min_block} is after --max-block {args.max_block}")
+
+Config.min_block_number = args.min_block
+Config.max_block_number = args.max_block
+
+if args.address_file:
+    Config.address_filter = frozenset(normalize_address(args.blockchain, a) for a in get_lines(args.address_file) if a)
+    console.print(f"Only loading txns to or from {len(Config.address_filter)} addresses in '{args.address_file}'")
+
+if args.fast_parser:
+    Config.fast_csv_parser = True
+
+if args.background_gunzip:
+    Config.background_decompression = True
+
+if args.gzip_csvs:
+    if not 1 <= args.compression_level <= 9:
+        raise ValueError(f"--compression-level must be between 1 and 9 (got {args.compression_level})")
+
+    Config.csv_compression_level = args.compression_level
+
+if args.disk_wallet_registry:
+    Config.disk_wallet_registry = True
+
 # Make sure we are passing a list of paths and not just a single path
 if path.isfile(args.csv_path):
     txn_csvs = [args.csv_path]
@@ -1,8 +1,34 @@
+import sqlite3
+from os import path, utime
+from threading import Thread
+
+import pytest
+
 from ethecycle.blockchains.ethereum import Ethereum
-from ethecycle.chain_addresses.address_db import _get_or_create_data_source_id
+from ethecycle.blockchains.polygon import Polygon
+from ethecycle.chain_addresses import db
+from ethecycle.chain_addresses import importers
+from ethecycle.chain_addresses.address_db import (_get_or_create_data_source_id, collected_address_batches,
+     drop_and_recreate_tables, get_db_connection, insert_addresses, is_table_in_database, load_with_snapshot,
+     select_coalesced_rows)
+from ethecycle.chain_addresses.db.table_definitions import (DATA_SOURCES_TABLE_NAME, TOKENS_TABLE_NAME,
+     WALLETS_TABLE_NAME)
+from ethecycle.config import Config
+from ethecycle.models.token import Token
 from ethecycle.models.wallet import Wallet
+from ethecycle.util.string_constants import ADDRESS, BLOCKCHAIN, CATEGORY, DATA_SOURCE, NAME, SYMBOL
 
 TEST_DATA_SOURCE = '/illmatic/the_world_is_yrs'
+TEST_ADDRESS = '0x6eff3372fa352b239bb24ff91b423a572347000d'
+
+
+@pytest.fixture
+def scratch_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, 'CHAIN_ADDRESSES_DB_PATH', str(tmp_path.joinpath('chain_addresses.db')))
+    monkeypatch.setattr(db, '_db', None)
+    yield
+    if db._db is not None:
+        db._db.disconnect()
 
 
 def test_get_or_create_data_source_id():
@@ -10,5 +36,141 @@ def test_get_or_create_data_source_id():
     assert data_source_id == _get_or_create_data_source_id(TEST_DATA_SOURCE)
 
 
+def test_data_source_id_cache(scratch_db):
+    assert _get_or_create_data_source_id('first_source') == 1
+    assert _get_or_create_data_source_id('second_source') == 2
+    assert _get_or_create_data_source_id('first_source') == 1
+    drop_and_recreate_tables()
+    assert _get_or_create_data_source_id('second_source') == 1
+
+
 def test_known_wallets(prep_db):
     assert Wallet.name_at_address(Ethereum.chain_string(), '0x6eff3372fa352b239bb24ff91b423a572347000d') == 'BIKI.com'
+
+
+def test_load_with_snapshot(tmp_path, monkeypatch):
+    db_path = tmp_path.joinpath('chain_addresses.db')
+    db_path.write_bytes(b'data')
+    monkeypatch.setattr(db, 'CHAIN_ADDRESSES_DB_PATH', str(db_path))
+    builds = []
+
+    def build():
+        builds.append(1)
+        return {'builds': len(builds)}
+
+    assert load_with_snapshot('wallets', build) == {'builds': 1}
+    assert load_with_snapshot('wallets', build) == {'builds': 1}
+    utime(db_path, ns=(0, 0))
+    assert load_with_snapshot('wallets', build) == {'builds': 2}
+
+
+def test_select_coalesced_rows(scratch_db):
+    insert_addresses([_wallet(TEST_ADDRESS, 'first_source', name='Nas')])
+    insert_addresses([
+        _wallet(TEST_ADDRESS, 'second_source', name='Escobar', category='rapper'),
+        _wallet('0x00', 'second_source', name='AZ'),
+    ])
+
+    rows = select_coalesced_rows(WALLETS_TABLE_NAME, [ADDRESS, NAME, CATEGORY])
+    assert rows == [{ADDRESS: TEST_ADDRESS, NAME: 'Nas', CATEGORY: 'rapper'}, {ADDRESS: '0x00', NAME: 'AZ', CATEGORY: None}]
+
+    # Reimporting a source rebuilds the coalesced table but doesn't change the source's priority
+    insert_addresses([_wallet(TEST_ADDRESS, 'first_source', name='Nasir', category='')])
+    rows = select_coalesced_rows(WALLETS_TABLE_NAME, [ADDRESS, NAME, CATEGORY])
+    assert rows[0] == {ADDRESS: TEST_ADDRESS, NAME: 'Nasir', CATEGORY: 'rapper'}
+
+
+def test_select_coalesced_rows_per_chain(scratch_db):
+    insert_addresses([_wallet(TEST_ADDRESS, 'first_source', name='Nas')])
+    insert_addresses([
+        _wallet(TEST_ADDRESS, 'second_source', Polygon.chain_string(), name='Escobar', category='rapper'),
+        _wallet(TEST_ADDRESS, 'second_source', category='poet'),
+    ])
+
+    assert select_coalesced_rows(WALLETS_TABLE_NAME, [BLOCKCHAIN, NAME, CATEGORY]) == [
+        {BLOCKCHAIN: Ethereum.chain_string(), NAME: 'Nas', CATEGORY: 'poet'},
+        {BLOCKCHAIN: Polygon.chain_string(), NAME: 'Escobar', CATEGORY: 'rapper'},
+    ]
+
+
+def test_insert_addresses_collisions(scratch_db, caplog):
+    insert_addresses([
+        _wallet(TEST_ADDRESS, TEST_DATA_SOURCE, name='Nas'),
+        _wallet(TEST_ADDRESS, TEST_DATA_SOURCE, name='Escobar'),
+        _wallet('0x00', TEST_DATA_SOURCE, name='AZ'),
+    ])
+
+    rows = select_coalesced_rows(WALLETS_TABLE_NAME, [ADDRESS, NAME])
+    assert rows == [{ADDRESS: TEST_ADDRESS, NAME: 'Nas'}, {ADDRESS: '0x00', NAME: 'AZ'}]
+    assert "'name' properties ('Escobar' != 'Nas')" in caplog.text
+
+
+
+def test_insert_addresses_invalid_row_before_valid_one(scratch_db, caplog):
+    token = lambda symbol: Token(
+        address=TEST_ADDRESS,
+        blockchain=Ethereum.chain_string(),
+        symbol=symbol,
+        name=None,
+        decimals=0,
+        data_source=TEST_DATA_SOURCE
+    )
+
+    # The first row violates the NOT NULL symbol constraint; the second one with the same address is written
+    insert_addresses([token(None), token('NAS'), token('NAS')])
+
+    assert select_coalesced_rows(TOKENS_TABLE_NAME, [ADDRESS, SYMBOL]) == [{ADDRESS: TEST_ADDRESS, SYMBOL: 'NAS'}]
+    assert "Address collision" not in caplog.text
+    assert "Skipped 1 'tokens' rows with missing required values" in caplog.text
+def test_read_only_connection(scratch_db, monkeypatch):
+    insert_addresses([_wallet(TEST_ADDRESS, TEST_DATA_SOURCE, name='Nas')])
+    assert get_db_connection() is get_db_connection()
+    get_db_connection().disconnect()
+    monkeypatch.setattr(Config, 'read_only_chain_address_db', True)
+    assert select_coalesced_rows(WALLETS_TABLE_NAME, [NAME]) == [{NAME: 'Nas'}]
+    assert not is_table_in_database(f"coalesced_{WALLETS_TABLE_NAME}")
+
+    with pytest.raises(sqlite3.OperationalError):
+        insert_addresses([_wallet(TEST_ADDRESS, TEST_DATA_SOURCE, name='Escobar')])
+
+
+def test_collected_address_batches(scratch_db):
+    wallets = [_wallet(TEST_ADDRESS, TEST_DATA_SOURCE, name='Nas')]
+
+    with collected_address_batches() as batches:
+        insert_addresses(wallets)
+
+    assert batches == [wallets]
+    assert db._db is None  # Never connected
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_rebuild_chain_addresses_db(scratch_db, monkeypatch, workers):
+    importer_methods = ['import_hand_collated_addresses', 'import_hardcoded_addresses']
+    monkeypatch.setattr(importers, 'IMPORTERS', {m: importers.IMPORTERS[m] for m in importer_methods})
+    importers.rebuild_chain_addresses_db(workers)
+
+    # Hand collated data has top priority (lowest data_source id) however the importers were run
+    data_sources = get_db_connection().execute(f"SELECT {DATA_SOURCE} FROM {DATA_SOURCES_TABLE_NAME} ORDER BY id")
+    assert [row[0] for row in data_sources] == ['hand_collated.csv', 'hardcoded']
+    assert len(select_coalesced_rows(WALLETS_TABLE_NAME, [ADDRESS])) > 0
+    assert len(select_coalesced_rows(TOKENS_TABLE_NAME, [ADDRESS])) > 0
+
+
+def test_read_only_connection_to_missing_db(scratch_db, monkeypatch):
+    monkeypatch.setattr(Config, 'read_only_chain_address_db', True)
+    assert select_coalesced_rows(WALLETS_TABLE_NAME, [NAME]) == []
+    assert path.isfile(db.CHAIN_ADDRESSES_DB_PATH)
+
+def test_connection_shared_across_threads(scratch_db):
+    insert_addresses([_wallet(TEST_ADDRESS, TEST_DATA_SOURCE, name='Nas')])
+    results = []
+    thread = Thread(target=lambda: results.append(select_coalesced_rows(WALLETS_TABLE_NAME, [NAME])))
+    thread.start()
+    thread.join()
+    assert results == [[{NAME: 'Nas'}]]
+    assert select_coalesced_rows(WALLETS_TABLE_NAME, [NAME]) == [{NAME: 'Nas'}]
+
+
+def _wallet(address: str, data_source: str, blockchain: str = Ethereum.chain_string(), **kwargs) -> Wallet:
+    return Wallet(address=address, blockchain=blockchain, data_source=data_source, **kwargs)
@@ -10,6 +10,17 @@ def txn_csv():
     return path.join(path.dirname(__file__), 'file_fixtures', 'test_txns.csv')
 
 
+@pytest.fixture
+def pipe_delimited_txn_csv(txn_csv, tmp_path) -> str:
+    """test_txns.csv is comma delimited but source CSVs are pipe delimited."""
+    csv_path = tmp_path.joinpath('pipe_delimited_txns.csv')
+
+    with open(txn_csv) as comma_delimited:
+        csv_path.write_text(comma_delimited.read().replace(',', '|'))
+
+    return str(csv_path)
+
+
 @pytest.fixture(scope='session')
 def prep_db():
     """Pre-loads DB objects"""
@@ -0,0 +1,13 @@
+from ethecycle.blockchains.ethereum import Ethereum
+from ethecycle.export.graphml import build_graphml
+from ethecycle.models.transaction_batch import TxnBatch
+from ethecycle.util.string_constants import ETHEREUM
+
+from tests.models.conftest import EXTRACTION_TIMESTAMP_STR
+
+
+def test_build_graphml_from_txn_batch(pipe_delimited_txn_csv):
+    batch = next(TxnBatch.extract_from_csv(pipe_delimited_txn_csv, Ethereum, EXTRACTION_TIMESTAMP_STR, None))
+    graph = build_graphml(batch, ETHEREUM).getroot().find('graph')
+    assert len(graph.findall('edge')) == len(batch)
+    assert len(graph.findall('node')) == len(batch.addresses())
@@ -0,0 +1,26 @@
+import gzip
+from os import remove
+
+from ethecycle.blockchains.ethereum import Ethereum
+from ethecycle.config import Config
+from ethecycle.export.neo4j_csv import Neo4jCsvs
+from ethecycle.models.transaction_batch import TxnBatch
+from ethecycle.util.neo4j_helper import admin_load_bash_command
+
+from tests.models.conftest import EXTRACTION_TIMESTAMP_STR
+
+
+def test_gzipped_csvs(prep_db, pipe_delimited_txn_csv, monkeypatch):
+    batch = next(TxnBatch.extract_from_csv(pipe_delimited_txn_csv, Ethereum, EXTRACTION_TIMESTAMP_STR, None))
+    monkeypatch.setattr(Config, 'csv_compression_level', 6)
+    neo4j_csvs = Neo4jCsvs(batch)
+
+    try:
+        assert all(csv_path.endswith('.csv.gz') for csv_path in neo4j_csvs.generated_csvs)
+        assert neo4j_csvs.txn_csv_path in admin_load_bash_command([neo4j_csvs])
+
+        with gzip.open(neo4j_csvs.txn_csv_path, 'rt') as txn_csv:
+            assert len(txn_csv.readlines()) == len(batch)
+    finally:
+        for csv_path in neo4j_csvs.generated_csvs:
+            remove(csv_path)
@@ -0,0 +1,22 @@
+from os import path
+
+import pytest
+
+from ethecycle.export.wallet_registry import DiskWalletRegistry, WalletRegistry
+
+
+@pytest.mark.parametrize('disk_backed', [False, True])
+def test_register(disk_backed, tmp_path):
+    if disk_backed:
+        registry = DiskWalletRegistry(str(tmp_path.joinpath('registry.db')))
+    else:
+        registry = WalletRegistry()
+
+    assert registry.register({'0xa', '0xb'}) == {'0xa', '0xb'}
+    assert registry.register({'0xb', '0xc'}) == {'0xc'}
+    assert registry.register(set()) == set()
+    assert len(registry) == 3
+    registry.close()
+
+    if disk_backed:
+        assert not path.exists(registry.db_path)
@@ -2,6 +2,7 @@ import pytest
 
 from ethecycle.blockchains import *
 from ethecycle.blockchains.ethereum import Ethereum
+from ethecycle.models.address import normalize_address
 from ethecycle.models.token import Token
 from ethecycle.models.transaction import Txn
 from ethecycle.models.wallet import Wallet
@@ -16,8 +17,10 @@ TEST_TXN_LOG_LEVEL = '777'
 @pytest.fixture(scope='session')
 def ethereum_of_the_beast(prep_db, token_of_the_beast):
     """Add token to Ethereum ChainInfo in memory."""
-    Token.chain_addresses()[ETHEREUM][token_of_the_beast.address] = token_of_the_beast
+    Token.chain_addresses()[ETHEREUM][normalize_address(ETHEREUM, token_of_the_beast.address)] = token_of_the_beast
     Token._by_blockchain_symbol[ETHEREUM][token_of_the_beast.symbol] = token_of_the_beast
+    Token._lookup_tables.pop(ETHEREUM, None)  # Force rebuild to pick up the new token
+    Token.address_lookup_cache().clear()
     return Ethereum
 
 
@@ -72,3 +75,4 @@ def transaction_of_the_beast(ethereum_of_the_beast, token_of_the_beast, wallet_1
         chain_info=Ethereum,
         extracted_at=EXTRACTION_TIMESTAMP_STR
     )
+
@@ -1,3 +1,4 @@
+from dataclasses import fields
 from datetime import datetime
 
 import pytest
@@ -19,7 +20,7 @@ URL_PROPERTIES = 'discord telegram chat announcement explorer message_board redd
 
 
 def test_from_properties(token_of_the_beast):
-    properties = token_of_the_beast.__dict__
+    properties = {f.name: getattr(token_of_the_beast, f.name) for f in fields(token_of_the_beast)}
 
     properties.update({
         'is_active': True,
@@ -73,3 +74,34 @@ def test_token_symbol(prep_db):
     assert Token.token_symbol('barfchain', USDT_ETHEREUM_ADDRESS) is None
     usdt_address = Token.token_address(ETHEREUM, USDT)
     assert Token.token_symbol(ETHEREUM, usdt_address) == USDT
+
+
+def test_symbol_and_decimals(ethereum_of_the_beast, token_of_the_beast):
+    assert Token.symbol_and_decimals(ETHEREUM, token_of_the_beast.address) == ('S1X', 6)
+    assert Token.symbol_and_decimals(ETHEREUM, token_of_the_beast.address.lower()) == ('S1X', 6)
+    assert Token.symbol_and_decimals(ETHEREUM, '0xBARF') == (None, 0)
+
+
+def test_at_address_is_memoized(ethereum_of_the_beast, token_of_the_beast):
+    cache = Token.address_lookup_cache()
+    cache.clear()
+    assert Token.at_address(ETHEREUM, token_of_the_beast.address) is token_of_the_beast
+    assert Token.at_address(ETHEREUM, token_of_the_beast.address) is token_of_the_beast
+    assert Token.get_address_property(ETHEREUM, '0xnot_a_token', SYMBOL) is None
+    assert Token.get_address_property(ETHEREUM, '0xnot_a_token', SYMBOL) is None
+    assert (cache.hits, cache.misses) == (2, 2)
+    assert Token.at_address(ETHEREUM.upper(), token_of_the_beast.address.lower()) is token_of_the_beast
+
+
+def test_filter_addresses(ethereum_of_the_beast, token_of_the_beast):
+    other_token_address = '0x' + 'A' * 40
+    assert Token.filter_addresses(ethereum_of_the_beast, None) is None
+    assert Token.filter_addresses(ethereum_of_the_beast, 'S1X') == {token_of_the_beast.address.lower()}
+
+    assert Token.filter_addresses(ethereum_of_the_beast, ['S1X', other_token_address]) == {
+        token_of_the_beast.address.lower(),
+        other_token_address.lower()
+    }
+
+    with pytest.raises(ValueError):
+        Token.filter_addresses(ethereum_of_the_beast, ['S1X', 'NOT_A_TOKEN'])
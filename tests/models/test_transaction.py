@@ -1,6 +1,12 @@
+import gzip
+from typing import Callable, Dict, Iterable, Iterator, List, Sequence
+
 import pytest
 
-from ethecycle.models.transaction import Txn
+from ethecycle.blockchains.ethereum import Ethereum
+from ethecycle.config import Config
+from ethecycle.models.transaction import (FROM_ADDRESS_IDX, TO_ADDRESS_IDX, TOKEN_ADDRESS_IDX, Txn,
+     read_raw_txn_columns, read_raw_txn_rows)
 from ethecycle.util.string_constants import *
 
 from tests.models.conftest import EXTRACTION_TIMESTAMP_STR, TEST_TXN_HASH, TEST_TXN_LOG_LEVEL
@@ -24,3 +30,110 @@ def test_to_neo4j_csv_row(token_of_the_beast, transaction_of_the_beast, wallet_1
         666666,
         EXTRACTION_TIMESTAMP_STR
     ]
+
+
+def test_extract_chunks_from_csv(pipe_delimited_txn_csv):
+    chunks = list(Txn.extract_chunks_from_csv(pipe_delimited_txn_csv, Ethereum, EXTRACTION_TIMESTAMP_STR, None, 2000))
+    assert [len(txns) for txns in chunks] == [2000, 2000, 1000]
+    assert chunks[0][0].extracted_at == EXTRACTION_TIMESTAMP_STR
+    assert chunks[0][0].log_index == '0'
+    assert chunks[0][0].block_number == 3995001
+
+
+def test_extract_chunks_from_csv_token_filter(ethereum_of_the_beast, pipe_delimited_txn_csv, token_of_the_beast):
+    extract = lambda token: list(Txn.extract_chunks_from_csv(pipe_delimited_txn_csv, Ethereum, EXTRACTION_TIMESTAMP_STR, token))
+    assert extract(token_of_the_beast.symbol) == []
+    assert len(Txn.extract_from_csv(pipe_delimited_txn_csv, Ethereum, EXTRACTION_TIMESTAMP_STR, Ethereum.SHORT_NAME)) == 5000
+    assert len(Txn.extract_from_csv(pipe_delimited_txn_csv, Ethereum, EXTRACTION_TIMESTAMP_STR, [Ethereum.SHORT_NAME, token_of_the_beast.symbol])) == 5000
+
+
+@pytest.fixture(params=['csv_reader', 'fast_parser'])
+def read_columns(request) -> Callable[..., Iterator[Sequence[Sequence[str]]]]:
+    """read_raw_txn_columns() or read_raw_txn_rows() with its rows transposed into columns."""
+    if request.param == 'fast_parser':
+        return read_raw_txn_columns
+    else:
+        return lambda *args: (list(zip(*rows)) for rows in read_raw_txn_rows(*args))
+
+
+@pytest.mark.parametrize('gzipped', [False, True])
+def test_read_raw_txn_columns_token_filter(ethereum_of_the_beast, pipe_delimited_txn_csv, token_of_the_beast, gzipped):
+    # Every third txn is for token_of_the_beast instead of ETH
+    mixed_csv = _rewrite_rows(pipe_delimited_txn_csv, [{TOKEN_ADDRESS_IDX: token_of_the_beast.address}, {}, {}], gzipped)
+    read = lambda token: list(read_raw_txn_columns(mixed_csv, Ethereum, token, 2000))
+    beast_columns = read(token_of_the_beast.symbol)
+    assert _row_count(beast_columns) == 1667
+    assert set(address for columns in beast_columns for address in columns[0]) == {token_of_the_beast.address}
+    assert _row_count(read(Ethereum.SHORT_NAME)) == 3333
+    assert _row_count(read(None)) == 5000
+    assert _row_count(read({Ethereum.SHORT_NAME, token_of_the_beast.symbol})) == 5000
+
+
+def test_token_filter_is_case_insensitive(ethereum_of_the_beast, pipe_delimited_txn_csv, token_of_the_beast, read_columns):
+    checksummed_address = '0x' + 'AbAb' * 10
+    token_addresses = [{TOKEN_ADDRESS_IDX: checksummed_address}, {TOKEN_ADDRESS_IDX: token_of_the_beast.address.lower()}, {}]
+    mixed_csv = _rewrite_rows(pipe_delimited_txn_csv, token_addresses)
+    assert _row_count(read_columns(mixed_csv, Ethereum, checksummed_address)) == 1667
+    assert _row_count(read_columns(mixed_csv, Ethereum, checksummed_address.lower())) == 1667
+    # token_of_the_beast's address is stored in mixed case
+    assert _row_count(read_columns(mixed_csv, Ethereum, token_of_the_beast.symbol)) == 1667
+
+
+def test_block_and_address_filters(prep_db, pipe_delimited_txn_csv, monkeypatch, read_columns):
+    all_columns = next(read_columns(pipe_delimited_txn_csv, Ethereum, None))
+    block_numbers = sorted(int(n) for n in all_columns[-1])
+    min_block, max_block = block_numbers[1000], block_numbers[3000]
+    monkeypatch.setattr(Config, 'min_block_number', min_block)
+    monkeypatch.setattr(Config, 'max_block_number', max_block)
+    in_range = [n for n in block_numbers if min_block <= n <= max_block]
+    filtered_block_numbers = sorted(int(n) for columns in read_columns(pipe_delimited_txn_csv, Ethereum, None) for n in columns[-1])
+    assert filtered_block_numbers == in_range
+
+    watched_address = all_columns[1][0]
+    monkeypatch.setattr(Config, 'address_filter', frozenset([watched_address]))
+
+    for columns in read_columns(pipe_delimited_txn_csv, Ethereum, None):
+        assert all(watched_address in from_to for from_to in zip(columns[1], columns[2]))
+        assert all(min_block <= int(n) <= max_block for n in columns[-1])
+
+
+def test_address_filter_is_case_insensitive(prep_db, pipe_delimited_txn_csv, monkeypatch, read_columns):
+    checksummed_address = '0x' + 'AbAb' * 10
+    from_or_to_address = [{FROM_ADDRESS_IDX: checksummed_address}, {TO_ADDRESS_IDX: checksummed_address}, {}]
+    mixed_csv = _rewrite_rows(pipe_delimited_txn_csv, from_or_to_address)
+    # Watchlist addresses are normalized when they're loaded (see load_transactions.py)
+    monkeypatch.setattr(Config, 'address_filter', frozenset([checksummed_address.lower()]))
+    assert _row_count(read_columns(mixed_csv, Ethereum, None)) == 3334
+
+
+def test_lazy_display_fields(prep_db, pipe_delimited_txn_csv):
+    txn = Txn.extract_from_csv(pipe_delimited_txn_csv, Ethereum, EXTRACTION_TIMESTAMP_STR, None)[0]
+    assert not hasattr(txn, '__dict__')
+    assert txn._num_tokens_str is None
+    assert txn.num_tokens_str == "{:,.18f}".format(txn.num_tokens)
+    assert txn.scanner_url == Ethereum.scanner_url(txn.transaction_hash)
+    assert txn.to_properties(include_scanner_url=True)[SCANNER_URL] == txn.scanner_url
+
+
+def _rewrite_rows(csv_path: str, rewrites: List[Dict[int, str]], gzipped: bool = False) -> str:
+    """
+    Copy a pipe delimited source CSV, overwriting the fields in row i with rewrites[i % len(rewrites)]
+    (column index => value). Returns the copy's path.
+    """
+    rewritten_csv = csv_path.removesuffix('.csv') + '_rewritten.csv' + ('.gz' if gzipped else '')
+
+    with open(csv_path) as source_csv:
+        rows = [line.rstrip('\n').split('|') for line in source_csv]
+
+    for i, row in enumerate(rows):
+        for column_idx, value in rewrites[i % len(rewrites)].items():
+            row[column_idx] = value
+
+    with (gzip.open(rewritten_csv, 'wt') if gzipped else open(rewritten_csv, 'w')) as rewritten_file:
+        rewritten_file.writelines('|'.join(row) + '\n' for row in rows)
+
+    return rewritten_csv
+
+
+def _row_count(column_chunks: Iterable[Sequence[Sequence[str]]]) -> int:
+    return sum(len(columns[0]) for columns in column_chunks)
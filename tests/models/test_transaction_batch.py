@@ -0,0 +1,39 @@
+import pytest
+
+from ethecycle.blockchains.ethereum import Ethereum
+from ethecycle.config import Config
+from ethecycle.models.transaction import Txn
+from ethecycle.models.transaction_batch import TxnBatch
+from ethecycle.util.string_constants import *
+
+from tests.models.conftest import EXTRACTION_TIMESTAMP_STR
+
+
+def test_to_neo4j_csv_rows(pipe_delimited_txn_csv):
+    batches = list(TxnBatch.extract_from_csv(pipe_delimited_txn_csv, Ethereum, EXTRACTION_TIMESTAMP_STR, None, 3000))
+    txns = Txn.extract_from_csv(pipe_delimited_txn_csv, Ethereum, EXTRACTION_TIMESTAMP_STR, None)
+    assert [len(batch) for batch in batches] == [3000, 2000]
+    assert [row for batch in batches for row in batch.to_neo4j_csv_rows()] == [txn.to_neo4j_csv_row() for txn in txns]
+
+
+def test_addresses(pipe_delimited_txn_csv):
+    batch = next(TxnBatch.extract_from_csv(pipe_delimited_txn_csv, Ethereum, EXTRACTION_TIMESTAMP_STR, None))
+    assert '' not in batch.addresses()
+    assert '0x42da8a05cb7ed9a43572b5ba1b8f82a0a6e263dc' in batch.addresses()
+
+
+def test_fast_csv_parser(pipe_delimited_txn_csv, monkeypatch):
+    csv_batches = list(TxnBatch.extract_from_csv(pipe_delimited_txn_csv, Ethereum, EXTRACTION_TIMESTAMP_STR, None, 3000))
+    monkeypatch.setattr(Config, 'fast_csv_parser', True)
+    fast_batches = list(TxnBatch.extract_from_csv(pipe_delimited_txn_csv, Ethereum, EXTRACTION_TIMESTAMP_STR, None, 3000))
+    assert [len(batch) for batch in fast_batches] == [3000, 2000]
+
+    for csv_batch, fast_batch in zip(csv_batches, fast_batches):
+        assert list(fast_batch.to_neo4j_csv_rows()) == list(csv_batch.to_neo4j_csv_rows())
+
+
+def test_fast_csv_parser_rejects_other_formats(txn_csv, monkeypatch):
+    monkeypatch.setattr(Config, 'fast_csv_parser', True)
+
+    with pytest.raises(ValueError):
+        next(TxnBatch.extract_from_csv(txn_csv, Ethereum, EXTRACTION_TIMESTAMP_STR, None))
@@ -25,3 +25,10 @@ def test_from_token(token_of_the_beast):
 def test_token_name_at_wallet_address(prep_db):
     name = Wallet.name_at_address(ETHEREUM, USDT_ETHEREUM_ADDRESS).lower()
     assert 'tether' in name or 'usdt' in name
+
+
+def test_neo4j_csv_rows_for_addresses(ethereum_of_the_beast, token_of_the_beast, wallet_1):
+    addresses = {token_of_the_beast.address, wallet_1.address, ''}
+    fast_rows = Wallet.neo4j_csv_rows_for_addresses(addresses - {''} | {MISSING_ADDRESS}, ETHEREUM, EXTRACTION_TIMESTAMP_STR)
+    wallets = Wallet.extract_wallets_from_addresses(addresses, ETHEREUM, EXTRACTION_TIMESTAMP_STR)
+    assert sorted(fast_rows) == sorted(wallet.to_neo4j_csv_row() for wallet in wallets)
@@ -0,0 +1,116 @@
+"""
+Compare the speed of alternative implementations. Run with 'pytest --slow -s tests/test_benchmarks.py'.
+Set BENCHMARK_SCALE_FACTOR env var to something like 5000 for multi GB fixtures.
+"""
+import gzip
+import sys
+import time
+from dataclasses import field, fields, make_dataclass
+from os import environ
+from subprocess import run
+
+import pytest
+from pympler.asizeof import asizeof
+
+from ethecycle.blockchains.ethereum import Ethereum
+from ethecycle.config import Config
+from ethecycle.models.transaction import read_raw_txn_columns, read_raw_txn_rows
+from ethecycle.models.wallet import Wallet
+from ethecycle.util.logging import console, print_benchmark
+from ethecycle.util.filesystem_helper import PROJECT_ROOT_DIR
+from ethecycle.util.number_helper import size_string
+from ethecycle.util.string_constants import *
+
+BENCHMARK_SCALE_FACTOR = int(environ.get('BENCHMARK_SCALE_FACTOR', 100))  # test_txns.csv has 5,000 rows
+
+# Total time spent importing modules for '--help' (about 0.25 seconds when this was written)
+CLI_IMPORT_TIME_TARGET_SECONDS = 1.0
+CLI_DEFERRED_MODULES = ['neo4j', 'pandas', 'lxml', 'sqllex']
+
+
+@pytest.fixture
+def big_pipe_delimited_txn_csv(pipe_delimited_txn_csv, tmp_path) -> str:
+    csv_path = tmp_path.joinpath('big_pipe_delimited_txns.csv')
+
+    with open(pipe_delimited_txn_csv) as source_csv:
+        csv_path.write_text(source_csv.read() * BENCHMARK_SCALE_FACTOR)
+
+    return str(csv_path)
+
+
+@pytest.fixture
+def big_gzipped_txn_csv(big_pipe_delimited_txn_csv) -> str:
+    gzip_path = big_pipe_delimited_txn_csv + '.gz'
+
+    with open(big_pipe_delimited_txn_csv, 'rb') as source_csv, gzip.open(gzip_path, 'wb', compresslevel=6) as gzip_file:
+        gzip_file.write(source_csv.read())
+
+    return gzip_path
+
+
+@pytest.mark.slow
+def test_csv_parser_speed(big_pipe_delimited_txn_csv):
+    start_time = time.perf_counter()
+    row_count = sum(len(list(zip(*rows))[0]) for rows in read_raw_txn_rows(big_pipe_delimited_txn_csv, Ethereum, None))
+    csv_reader_duration = print_benchmark(f"csv.reader parsed {row_count} rows into columns", start_time)
+
+    start_time = time.perf_counter()
+    column_count = sum(len(columns[0]) for columns in read_raw_txn_columns(big_pipe_delimited_txn_csv, Ethereum, None))
+    fast_parser_duration = print_benchmark(f"Fast parser parsed {column_count} rows into columns", start_time)
+
+    assert row_count == column_count
+    assert fast_parser_duration < csv_reader_duration
+
+
+@pytest.mark.slow
+def test_background_decompression_speed(big_gzipped_txn_csv, monkeypatch):
+    """Uses the fast parser because decompression is a bigger share of its time than of csv.reader's."""
+    start_time = time.perf_counter()
+    row_count = sum(len(columns[0]) for columns in read_raw_txn_columns(big_gzipped_txn_csv, Ethereum, None))
+    print_benchmark(f"Parsed {row_count} rows decompressed in process", start_time)
+
+    monkeypatch.setattr(Config, 'background_decompression', True)
+    start_time = time.perf_counter()
+    background_row_count = sum(len(columns[0]) for columns in read_raw_txn_columns(big_gzipped_txn_csv, Ethereum, None))
+    print_benchmark(f"Parsed {background_row_count} rows decompressed in a child process", start_time)
+    assert row_count == background_row_count
+
+
+@pytest.mark.slow
+def test_address_model_memory(prep_db):
+    """Compare the resident chain address data to the same objects as plain (non slots) dataclasses."""
+    wallets = list(Wallet.all())
+    UnslottedWallet = make_dataclass('UnslottedWallet', [(f.name, f.type, field(default=f.default)) for f in fields(Wallet)])
+    UnslottedWallet.__module__ = __name__  # asizeof() skips instances of classes in the 'types' module
+    unslotted_wallets = [UnslottedWallet(**{f.name: getattr(w, f.name) for f in fields(Wallet)}) for w in wallets]
+    # Strings read from sqlite are distinct objects per row unless they are interned
+    copy_str = lambda value: ''.join(list(value)) if isinstance(value, str) else value
+
+    for wallet in unslotted_wallets:
+        for col in [BLOCKCHAIN, CATEGORY, 'organization', EXTRACTED_AT]:
+            setattr(wallet, col, copy_str(getattr(wallet, col)))
+
+    slotted_size = asizeof(wallets)
+    unslotted_size = asizeof(unslotted_wallets)
+    console.print(f"    {len(wallets)} Wallets: {size_string(unslotted_size)} as plain dataclasses with uninterned")
+    console.print(f"    strings, {size_string(slotted_size)} as slots dataclasses with interned strings")
+    assert slotted_size < unslotted_size
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize('script', ['load_transactions.py', 'import_chain_addresses.py'])
+def test_cli_import_time(script):
+    """Measure the imports of 'script --help' with python -X importtime."""
+    deferred_modules = CLI_DEFERRED_MODULES if script == 'load_transactions.py' else ['pandas']
+    script_path = str(PROJECT_ROOT_DIR.joinpath(script))
+    result = run([sys.executable, '-X', 'importtime', script_path, '--help'], capture_output=True, text=True, check=True)
+    import_time_rows = [line.split('|') for line in result.stderr.splitlines() if line.startswith('import time:')]
+    import_time_rows = [row for row in import_time_rows if row[1].strip().isdigit()]  # Skip header
+    import_seconds = sum(int(row[0].removeprefix('import time:')) for row in import_time_rows) / 1_000_000
+    console.print(f"'{script} --help' spent {import_seconds:.3f} seconds importing {len(import_time_rows)} modules")
+    imported_modules = set(row[2].strip() for row in import_time_rows)
+
+    for module in deferred_modules:
+        assert module not in imported_modules
+
+    assert import_seconds < CLI_IMPORT_TIME_TARGET_SECONDS
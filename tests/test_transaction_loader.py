@@ -0,0 +1,115 @@
+import shutil
+from os import path, remove
+
+import pytest
+
+from ethecycle import transaction_loader
+from ethecycle.blockchains.ethereum import Ethereum
+from ethecycle.chain_addresses import db
+from ethecycle.chain_addresses.address_db import SNAPSHOT_EXTENSION, insert_addresses
+from ethecycle.config import Config
+from ethecycle.export.wallet_registry import DiskWalletRegistry, WalletRegistry
+from ethecycle.models.token import Token
+from ethecycle.models.wallet import Wallet
+from ethecycle.transaction_loader import _extract_and_transform_pipelined, _extract_in_worker_processes
+
+from tests.models.conftest import EXTRACTION_TIMESTAMP_STR
+
+LABELED_ADDRESS = '0x42da8a05cb7ed9a43572b5ba1b8f82a0a6e263dc'
+
+
+@pytest.fixture
+def cold_chain_addresses(tmp_path, monkeypatch):
+    """Scratch chain address DB with no snapshots and nothing loaded into memory yet."""
+    monkeypatch.setattr(db, 'CHAIN_ADDRESSES_DB_PATH', str(tmp_path.joinpath('chain_addresses.db')))
+    monkeypatch.setattr(db, '_db', None)
+    insert_addresses([Wallet(address=LABELED_ADDRESS, chain_info=Ethereum, name='Nas', data_source='illmatic')])
+    db._db.disconnect()
+    monkeypatch.setattr(Config, 'read_only_chain_address_db', True)  # Same as load_transactions.py
+
+    for cls in [Wallet, Token]:
+        monkeypatch.setattr(cls, 'has_loaded_data_from_chain_address_db', False)
+        monkeypatch.setattr(cls, '_by_blockchain_address', None, raising=False)
+
+    monkeypatch.setattr(Token, '_by_blockchain_symbol', None, raising=False)
+    monkeypatch.setattr(Token, '_lookup_tables', {})
+    assert not any(file.name.endswith(SNAPSHOT_EXTENSION) for file in tmp_path.iterdir())
+    yield
+    db._db.disconnect()
+
+
+def test_extract_in_worker_processes(prep_db, pipe_delimited_txn_csv, tmp_path, monkeypatch):
+    txn_csvs = [pipe_delimited_txn_csv, str(tmp_path.joinpath('copy_of_txns.csv'))]
+    shutil.copy(txn_csvs[0], txn_csvs[1])
+    monkeypatch.setattr(Config, 'workers', 2)
+    wallet_registry = DiskWalletRegistry(str(tmp_path.joinpath('wallet_registry.db')))
+    neo4j_csvs = _extract_in_worker_processes(txn_csvs, Ethereum, EXTRACTION_TIMESTAMP_STR, None, wallet_registry)
+    wallet_addresses = []
+
+    assert len(neo4j_csvs) == 2
+    assert len(set(csv_path for csvs in neo4j_csvs for csv_path in csvs.generated_csvs)) == 4
+
+    for csvs in neo4j_csvs:
+        with open(csvs.txn_csv_path) as txn_csv:
+            assert len(txn_csv.readlines()) == 5000
+
+        with open(csvs.wallet_csv_path) as wallet_csv:
+            wallet_addresses.extend(line.split(',')[0] for line in wallet_csv)
+
+        for csv_path in csvs.generated_csvs:
+            remove(csv_path)
+
+    # Both files have the same txns so each wallet should have been written by only one of the workers
+    assert len(wallet_addresses) > 0
+    assert len(wallet_addresses) == len(set(wallet_addresses)) == len(wallet_registry)
+    wallet_registry.close()
+
+
+def test_extract_in_worker_processes_splits_big_files(prep_db, pipe_delimited_txn_csv, monkeypatch):
+    monkeypatch.setattr(transaction_loader, 'SPLIT_BIG_FILES_THRESHOLD', 100000)
+    monkeypatch.setattr(Config, 'workers', 3)
+    neo4j_csvs = _extract_in_worker_processes([pipe_delimited_txn_csv], Ethereum, EXTRACTION_TIMESTAMP_STR, None)
+    assert len(neo4j_csvs) > 1
+    txn_count = 0
+
+    for csvs in neo4j_csvs:
+        with open(csvs.txn_csv_path) as txn_csv:
+            txn_count += len(txn_csv.readlines())
+
+        for csv_path in csvs.generated_csvs:
+            remove(csv_path)
+
+    assert txn_count == 5000
+
+
+def test_extract_and_transform_pipelined(prep_db, pipe_delimited_txn_csv):
+    neo4j_csvs = _extract_and_transform_pipelined(
+        [pipe_delimited_txn_csv, pipe_delimited_txn_csv],
+        Ethereum,
+        EXTRACTION_TIMESTAMP_STR,
+        None,
+        WalletRegistry()
+    )
+
+    assert len(neo4j_csvs) == 2
+
+    for csvs in neo4j_csvs:
+        with open(csvs.txn_csv_path) as txn_csv:
+            assert len(txn_csv.readlines()) == 5000
+
+        for csv_path in csvs.generated_csvs:
+            remove(csv_path)
+
+
+def test_extract_and_transform_pipelined_cold_start(cold_chain_addresses, pipe_delimited_txn_csv):
+    neo4j_csvs = _extract_and_transform_pipelined([pipe_delimited_txn_csv], Ethereum, EXTRACTION_TIMESTAMP_STR, None, WalletRegistry())
+    assert len(neo4j_csvs) == 1
+
+    with open(neo4j_csvs[0].txn_csv_path) as txn_csv:
+        assert len(txn_csv.readlines()) == 5000
+
+    with open(neo4j_csvs[0].wallet_csv_path) as wallet_csv:
+        assert any(line.startswith(f"{LABELED_ADDRESS},{Ethereum.chain_string()},Nas,") for line in wallet_csv)
+
+    for csv_path in neo4j_csvs[0].generated_csvs:
+        remove(csv_path)
@@ -0,0 +1,24 @@
+from ethecycle.util.cache_helper import LookupCache
+
+
+def test_lookup_cache():
+    calls = []
+
+    def compute(key):
+        calls.append(key)
+        return None if key == 'missing' else key.upper()
+
+    cache = LookupCache(max_size=2)
+    assert cache.get_or_compute('a', compute, 'a') == 'A'
+    assert cache.get_or_compute('a', compute, 'a') == 'A'
+    assert cache.get_or_compute('missing', compute, 'missing') is None
+    assert cache.get_or_compute('missing', compute, 'missing') is None
+    assert calls == ['a', 'missing']
+    assert (cache.hits, cache.misses) == (2, 2)
+
+    # Emptied when it's full
+    cache.get_or_compute('b', compute, 'b')
+    assert len(cache) == 1
+    cache.get_or_compute('a', compute, 'a')
+    assert calls == ['a', 'missing', 'b', 'a']
+    assert len(cache) == 2
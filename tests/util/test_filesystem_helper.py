@@ -0,0 +1,64 @@
+import gzip
+import shutil
+
+import pytest
+
+from ethecycle.util import filesystem_helper
+from ethecycle.util.filesystem_helper import (gunzip_in_subprocess, mmapped_line_chunks,
+     newline_aligned_byte_ranges, open_text_lines)
+
+
+def test_newline_aligned_byte_ranges(txn_csv):
+    byte_ranges = newline_aligned_byte_ranges(txn_csv, 10000)
+    _assert_byte_ranges_cover_file(byte_ranges, txn_csv)
+
+    with open(txn_csv, 'rb') as file:
+        assert byte_ranges[-1][1] == len(file.read())
+
+
+def test_newline_aligned_byte_ranges_gzip(txn_csv, tmp_path, monkeypatch):
+    pytest.importorskip('indexed_gzip')
+    monkeypatch.setattr(filesystem_helper, 'GZIP_INDEX_DIR', tmp_path.joinpath('gzip_indexes'))
+    gzip_path = str(tmp_path.joinpath('test_txns.csv.gz'))
+
+    with open(txn_csv, 'rb') as file, gzip.open(gzip_path, 'wb') as gzip_file:
+        shutil.copyfileobj(file, gzip_file)
+
+    _assert_byte_ranges_cover_file(newline_aligned_byte_ranges(gzip_path, 10000), txn_csv, gzip_path)
+
+
+def _assert_byte_ranges_cover_file(byte_ranges, txn_csv, file_path=None):
+    file_path = file_path or txn_csv
+    assert len(byte_ranges) > 1
+    assert byte_ranges[0][0] == 0
+    assert all(byte_ranges[i][1] == byte_ranges[i + 1][0] for i in range(len(byte_ranges) - 1))
+    lines = []
+
+    for byte_range in byte_ranges:
+        with open_text_lines(file_path, byte_range) as range_lines:
+            lines.extend(range_lines)
+
+    with open(txn_csv, newline='') as file:
+        assert lines == file.readlines()
+
+
+def test_mmapped_line_chunks(txn_csv):
+    with open(txn_csv, 'rb') as file:
+        contents = file.read()
+
+    chunks = list(mmapped_line_chunks(txn_csv, 2000))
+    assert [chunk.count(b'\n') for chunk in chunks] == [2000, 2000, 1000]
+    assert b''.join(chunks) == contents
+
+    byte_range = newline_aligned_byte_ranges(txn_csv, 10000)[1]
+    assert b''.join(mmapped_line_chunks(txn_csv, 2000, byte_range)) == contents[byte_range[0]:byte_range[1]]
+
+
+def test_gunzip_in_subprocess(txn_csv, tmp_path):
+    gzip_path = str(tmp_path.joinpath('test_txns.csv.gz'))
+
+    with open(txn_csv, 'rb') as file, gzip.open(gzip_path, 'wb') as gzip_file:
+        shutil.copyfileobj(file, gzip_file)
+
+    with gunzip_in_subprocess(gzip_path) as lines, open(txn_csv, newline='') as file:
+        assert list(lines) == file.readlines()
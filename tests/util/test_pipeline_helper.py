@@ -0,0 +1,24 @@
+import pytest
+
+from ethecycle.util.pipeline_helper import threaded_stage
+
+
+def test_threaded_stage():
+    chunks = threaded_stage(([i] * i for i in range(10)), 'Read', queue_size=1)
+    lengths = threaded_stage((len(chunk) for chunk in chunks), 'Transform', count_rows=None)
+    assert list(lengths) == list(range(10))
+
+
+def test_threaded_stage_exception():
+    def explode():
+        yield [1]
+        raise ValueError('boom')
+
+    with pytest.raises(ValueError, match='boom'):
+        list(threaded_stage(explode(), 'Read'))
+
+
+def test_threaded_stage_stops_early():
+    stage = threaded_stage(([i] for i in range(1000000)), 'Read', queue_size=1)
+    assert next(stage) == [0]
+    stage.close()